@@ -2,11 +2,9 @@ from PIL import Image, ImageChops
 import sys
 import math
 
-def align_torch_precise(path):
-    print(f"Aligning {path} with precision...")
-    img = Image.open(path).convert("RGBA")
+def align_torch_image(img, n_frames=4):
+    img = img.convert("RGBA")
     w, h = img.size
-    n_frames = 4
     frame_w = w // n_frames
     
     frames = []
@@ -78,6 +76,11 @@ def align_torch_precise(path):
         # So paste at (i*w + dx, dy)
         new_img.paste(frame, (i * frame_w + dx, dy))
         
+    return new_img
+
+def align_torch_precise(path):
+    print(f"Aligning {path} with precision...")
+    new_img = align_torch_image(Image.open(path))
     new_img.save(path)
     print("Precision alignment complete.")
 
@@ -0,0 +1,45 @@
+import re
+import os
+
+# Helpers shared by the asset pipeline scripts to read ASSET_MANIFEST
+# (src/data/assets.ts) without a TypeScript toolchain.
+
+MANIFEST_PATH = "src/data/assets.ts"
+PUBLIC_DIR = "public"
+
+ENTRY_RE = re.compile(r"\{\s*key:\s*'([^']+)'\s*,\s*src:\s*'([^']+)'\s*\}")
+
+
+def load_manifest(manifest_path=MANIFEST_PATH):
+    # Returns one dict per live (non commented-out) entry, in file order.
+    # Duplicate keys are kept so callers can report them.
+    entries = []
+    with open(manifest_path, encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            stripped = line.strip()
+            if stripped.startswith("//"):
+                continue
+            match = ENTRY_RE.search(line)
+            if not match:
+                continue
+            comment = ""
+            tail = line[match.end():]
+            if "//" in tail:
+                comment = tail.split("//", 1)[1].strip()
+            entries.append({
+                'key': match.group(1),
+                'src': match.group(2),
+                'line': lineno,
+                'comment': comment,
+            })
+    return entries
+
+
+def src_to_path(src, public_dir=PUBLIC_DIR):
+    # '/sprites/goblin.png' -> 'public/sprites/goblin.png'
+    return os.path.join(public_dir, *src.lstrip("/").split("/"))
+
+
+def path_to_src(path, public_dir=PUBLIC_DIR):
+    rel = os.path.relpath(path, public_dir)
+    return "/" + rel.replace(os.sep, "/")
@@ -0,0 +1,228 @@
+from PIL import Image
+import json
+import re
+import sys
+import os
+
+from asset_manifest import load_manifest, src_to_path, path_to_src
+from publish_assets import split_hashed
+
+# Texture memory report for ASSET_MANIFEST + public/sprites.
+#
+# useAssetLoader decodes every manifest entry up front, so each key costs
+# width * height * 4 bytes of RGBA for the whole session. This ranks them,
+# groups them per biome and flags what can be shrunk or deleted first.
+
+SPRITES_DIR = "public/sprites"
+SRC_DIR = "src"
+IMAGE_EXTS = ('.png', '.jpg', '.jpeg', '.webp', '.gif', '.svg')
+
+SIZE = 96           # constants.ts SIZE
+TILE_W = 96
+OVERSIZE_RATIO = 2.0
+
+# Enemy sheets produced by stitch_sprites.py (8x4 grid of 256px cells)
+ENEMY_SHEETS = ['rat', 'bat', 'spider', 'wolf', 'goblin_king', 'skeleton', 'goblin']
+
+# key -> (cols, rows, widest on-screen size of one frame in px)
+RENDER_HINTS = {key: (8, 4, SIZE * 1.5) for key in ENEMY_SHEETS}
+# drawSpriteIsoFloor draws a 2x2 quadrant of every floor texture it can pick
+# (variants 1-3), so their frames are a quarter of the image
+RENDER_HINTS.update({key: (2, 2, TILE_W * 1.25) for key in (
+    'floor', 'floor_grass', 'floor_dirt', 'floor_cave', 'floor_crypt', 'floor_hell')})
+RENDER_HINTS.update({
+    'floor_grass_v6': (1, 1, TILE_W * 1.25),
+    'floor_grass_v7': (1, 1, TILE_W * 1.25),
+    'floor_grass_v8': (1, 1, TILE_W * 1.25),
+    'lava_flow': (1, 1, TILE_W * 1.25),
+    'wall': (1, 1, TILE_W),
+    'wall_cave': (1, 1, TILE_W),
+    'wall_crypt': (1, 1, TILE_W),
+    'hell_wall': (1, 1, TILE_W),
+    'torch_animated': (4, 1, SIZE),
+    'lich': (1, 1, SIZE * 1.5),
+    'cultist': (1, 1, SIZE * 1.5),
+    'skeleton_mage': (1, 1, SIZE * 1.5),
+})
+# Single props not listed above are drawn at most this wide
+DEFAULT_PROP_WIDTH = SIZE * 2
+
+# First matching rule wins; matched against the manifest key
+BIOME_RULES = [
+    ('lava', ('hell', 'lava')),
+    ('crypt', ('crypt', 'lich')),
+    ('cave', ('cave',)),
+    ('home', ('grass', 'tree', 'rock', 'dungeon_gate', 'workbench', 'plant', 'anvil',
+              'blacksmith', 'merchant', 'elder', 'sage', 'floor_dirt')),
+    ('player', ('player', 'warrior')),
+    ('enemies', tuple(ENEMY_SHEETS) + ('cultist', 'skeleton_mage')),
+]
+
+
+def biome_for(key):
+    for biome, needles in BIOME_RULES:
+        if any(n in key for n in needles):
+            return biome
+    return 'common'
+
+
+def image_size(path):
+    if path.lower().endswith('.svg'):
+        return None
+    try:
+        with Image.open(path) as img:  # header only, no decode
+            return img.size
+    except Exception:
+        return None
+
+
+def oversize_ratio(key, size):
+    if size is None:
+        return None
+    if key in RENDER_HINTS:
+        cols, rows, drawn = RENDER_HINTS[key]
+    elif 'sheet' in key:
+        return None  # unknown frame layout
+    else:
+        cols, rows, drawn = 1, 1, DEFAULT_PROP_WIDTH
+    frame_w = size[0] / cols
+    return frame_w / drawn
+
+
+def scan_sprites(sprites_dir=SPRITES_DIR):
+    found = []
+    for root, _, files in os.walk(sprites_dir):
+        for name in files:
+            if name.lower().endswith(IMAGE_EXTS):
+                found.append(os.path.normpath(os.path.join(root, name)))
+    return sorted(found)
+
+
+def code_references(src_dir=SRC_DIR):
+    # '/sprites/...' literals outside the manifest also keep a file alive
+    refs = set()
+    pattern = re.compile(r"['\"`](/sprites/[^'\"`]+)")
+    for root, _, files in os.walk(src_dir):
+        for name in files:
+            if not name.endswith(('.ts', '.tsx', '.js', '.jsx', '.css')):
+                continue
+            with open(os.path.join(root, name), encoding="utf-8") as f:
+                refs.update(pattern.findall(f.read()))
+    return refs
+
+
+def build_report(sprites_dir=SPRITES_DIR):
+    entries = load_manifest()
+    key_counts = {}
+    path_keys = {}
+    for e in entries:
+        key_counts[e['key']] = key_counts.get(e['key'], 0) + 1
+        path_keys.setdefault(os.path.normpath(src_to_path(e['src'])), []).append(e['key'])
+
+    rows = []
+    seen_keys = set()
+    for e in entries:
+        path = os.path.normpath(src_to_path(e['src']))
+        exists = os.path.exists(path)
+        size = image_size(path) if exists else None
+        flags = []
+
+        if not exists:
+            flags.append('MISSING')
+        elif path.lower().endswith('.svg'):
+            flags.append('SVG')
+        if key_counts[e['key']] > 1:
+            flags.append('DUPLICATE-KEY')
+        if len(path_keys[path]) > 1:
+            flags.append('SHARED-FILE')
+
+        ratio = oversize_ratio(e['key'], size)
+        if ratio is not None and ratio > OVERSIZE_RATIO:
+            flags.append(f"OVERSIZED x{ratio:.1f}")
+
+        # SpriteManager caches by key, so a repeated key only decodes once
+        decoded = size[0] * size[1] * 4 if size and e['key'] not in seen_keys else 0
+        seen_keys.add(e['key'])
+
+        rows.append({
+            'key': e['key'],
+            'src': e['src'],
+            'line': e['line'],
+            'size': list(size) if size else None,
+            'decoded': decoded,
+            'file_bytes': os.path.getsize(path) if exists else 0,
+            'biome': biome_for(e['key']),
+            'flags': flags,
+        })
+
+    referenced = set(path_keys)
+    referenced.update(os.path.normpath(src_to_path(src)) for src in code_references())
+    # Stable-name sources of content-hashed files published by publish_assets.py
+    referenced.update(''.join(split_hashed(path)) for path in list(referenced))
+    orphans = []
+    for path in scan_sprites(sprites_dir):
+        if path in referenced:
+            continue
+        size = image_size(path)
+        orphans.append({
+            'src': path_to_src(path),
+            'size': list(size) if size else None,
+            'decoded': size[0] * size[1] * 4 if size else 0,
+            'file_bytes': os.path.getsize(path),
+        })
+
+    biomes = {}
+    for row in rows:
+        biomes[row['biome']] = biomes.get(row['biome'], 0) + row['decoded']
+
+    rows.sort(key=lambda r: -r['decoded'])
+    orphans.sort(key=lambda o: -o['file_bytes'])
+    return {
+        'total_decoded': sum(r['decoded'] for r in rows),
+        'biomes': dict(sorted(biomes.items(), key=lambda b: -b[1])),
+        'assets': rows,
+        'orphans': orphans,
+    }
+
+
+def mb(n):
+    return f"{n / (1024 * 1024):7.2f} MB"
+
+
+def print_report(report, limit=None):
+    print(f"Decoded texture memory after load: {mb(report['total_decoded'])}\n")
+
+    print(f"{'#':>3}  {'key':<24} {'size':>11}  {'decoded':>10}  {'biome':<8} flags")
+    for i, row in enumerate(report['assets'][:limit] if limit else report['assets'], 1):
+        size = f"{row['size'][0]}x{row['size'][1]}" if row['size'] else "-"
+        print(f"{i:>3}  {row['key']:<24} {size:>11}  {mb(row['decoded'])}  {row['biome']:<8} {', '.join(row['flags'])}")
+
+    print("\nPer biome:")
+    for biome, total in report['biomes'].items():
+        print(f"  {biome:<8} {mb(total)}")
+
+    if report['orphans']:
+        total = sum(o['file_bytes'] for o in report['orphans'])
+        print(f"\nOrphaned files ({len(report['orphans'])}, {total / 1024:.0f} KB on disk):")
+        for o in report['orphans']:
+            size = f"{o['size'][0]}x{o['size'][1]}" if o['size'] else "-"
+            print(f"  {o['src']:<56} {size:>11}  {o['file_bytes'] / 1024:8.0f} KB")
+
+
+if __name__ == "__main__":
+    as_json = False
+    limit = None
+    for arg in sys.argv[1:]:
+        if arg == "--json":
+            as_json = True
+        elif arg.startswith("--top="):
+            limit = int(arg.split("=")[1])
+        else:
+            print("Usage: python asset_report.py [--top=N] [--json]")
+            sys.exit(1)
+
+    report = build_report()
+    if as_json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, limit)
@@ -0,0 +1,201 @@
+from PIL import Image
+import numpy as np
+import json
+import sys
+import os
+
+from asset_manifest import load_manifest, src_to_path, path_to_src
+
+# Bakes groups of isometric floor tiles into single chunk textures so the map
+# renderer can issue one drawImage per chunk instead of one per tile.
+#
+# Geometry mirrors drawSpriteIsoFloor in src/renderer/map.ts: tiles are 96x48
+# diamonds placed with toScreen() and drawn 1.25x larger, centred on the tile.
+# A tile draws the whole floor texture for renderTile.variant 0 and one
+# quadrant of it otherwise, so one chunk is baked per (texture, variant). It
+# reproduces the per-tile draws exactly wherever all tiles of a chunk share
+# the same floor texture and variant (DungeonGenerator/HomeGenerator derive
+# the variant from slowly varying noise, so most chunks do). Mixed chunks,
+# lava tiles and the grass noise overlays stay per tile.
+
+TILE_W = 96
+TILE_H = 48
+DRAW_SCALE = 1.25
+
+CHUNK_TILES = 8     # 8x8 tiles per chunk
+
+# Floor textures drawSpriteIsoFloor can pick (getBiomeSprite + tile type)
+FLOOR_KEYS = ['floor_grass', 'floor_dirt', 'floor', 'floor_cave', 'floor_crypt', 'floor_hell']
+
+# renderTile.variant -> (col, row) of the 2x2 texture atlas; None = whole image
+VARIANT_QUADRANTS = {
+    0: None,        # Plain
+    1: (1, 0),      # Flowers
+    2: (0, 1),      # Sparse
+    3: (1, 1),      # Lush
+}
+
+SEAM_TOLERANCE = 24.0   # mean abs RGB difference across opposite diamond edges
+MIN_COVERAGE = 0.95     # fraction of the diamond that must be opaque
+
+
+def diamond_edge_samples(arr, inset=2, samples=32):
+    # Returns pixels just inside each of the four diamond edges, sampled at the
+    # same parametric positions so opposite edges line up.
+    h, w = arr.shape[:2]
+    t = np.linspace(0.1, 0.9, samples)
+    cx, cy = (w - 1) / 2.0, (h - 1) / 2.0
+    # Diamond corners: top, right, bottom, left
+    top = np.array([cx, inset])
+    right = np.array([w - 1 - inset * 2, cy])
+    bottom = np.array([cx, h - 1 - inset])
+    left = np.array([inset * 2, cy])
+
+    def sample(a, b):
+        pts = a[None, :] + (b - a)[None, :] * t[:, None]
+        xs = np.clip(np.round(pts[:, 0]).astype(int), 0, w - 1)
+        ys = np.clip(np.round(pts[:, 1]).astype(int), 0, h - 1)
+        return arr[ys, xs].astype(np.float32)
+
+    # NW edge (left->top) pairs with SE edge (bottom->right) on the x+1 neighbour,
+    # NE edge (top->right) pairs with SW edge (left->bottom) on the y+1 neighbour.
+    return {
+        'nw': sample(left, top), 'se': sample(bottom, right),
+        'ne': sample(top, right), 'sw': sample(left, bottom),
+    }
+
+
+def diamond_mask(h, w):
+    ys, xs = np.mgrid[0:h, 0:w]
+    return (np.abs(xs - (w - 1) / 2.0) / (w / 2.0) + np.abs(ys - (h - 1) / 2.0) / (h / 2.0)) <= 1.0
+
+
+def check_seamless(img):
+    arr = np.asarray(img.convert("RGBA"))
+    edges = diamond_edge_samples(arr)
+    seam_a = np.abs(edges['nw'][:, :3] - edges['se'][:, :3]).mean()
+    seam_b = np.abs(edges['ne'][:, :3] - edges['sw'][:, :3]).mean()
+    mask = diamond_mask(*arr.shape[:2])
+    coverage = (arr[..., 3][mask] > 200).mean()
+    return {
+        'seam': float(max(seam_a, seam_b)),
+        'coverage': float(coverage),
+        'ok': max(seam_a, seam_b) <= SEAM_TOLERANCE and coverage >= MIN_COVERAGE,
+    }
+
+
+def chunk_geometry(n=CHUNK_TILES):
+    draw_w = int(TILE_W * DRAW_SCALE)
+    draw_h = int(TILE_H * DRAW_SCALE)
+    pad_x = (draw_w - TILE_W) // 2
+    pad_y = (draw_h - TILE_H) // 2
+    width = n * TILE_W + pad_x * 2
+    height = n * TILE_H + pad_y * 2
+    # Pixel position of toScreen(0, 0) for the chunk's first tile
+    origin = (n * TILE_W // 2 + pad_x, pad_y)
+    return width, height, origin, (draw_w, draw_h)
+
+
+def variant_tile(img, variant, draw_size):
+    # Same source rect drawSpriteIsoFloor passes to drawImage
+    quadrant = VARIANT_QUADRANTS[variant]
+    if quadrant is not None:
+        sw, sh = img.width / 2, img.height / 2
+        col, row = quadrant
+        img = img.crop((round(col * sw), round(row * sh), round((col + 1) * sw), round((row + 1) * sh)))
+    return img.resize(draw_size, Image.Resampling.LANCZOS)
+
+
+def bake_chunk(tile, n=CHUNK_TILES):
+    width, height, (ox, oy), (draw_w, draw_h) = chunk_geometry(n)
+    chunk = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+
+    # Same painter's order as the map loop (y outer, x inner)
+    for y in range(n):
+        for x in range(n):
+            sx = (x - y) * (TILE_W // 2)
+            sy = (x + y) * (TILE_H // 2)
+            dx = ox + sx - draw_w // 2
+            dy = oy + sy - (draw_h - TILE_H) // 2
+            chunk.alpha_composite(tile, dest=(dx, dy))
+    return chunk
+
+
+def bake_floor_chunks(out_dir="public/sprites/chunks", keys=FLOOR_KEYS, n=CHUNK_TILES, strict=False):
+    manifest = {e['key']: e['src'] for e in load_manifest()}
+    width, height, origin, _ = chunk_geometry(n)
+    draw_size = (int(TILE_W * DRAW_SCALE), int(TILE_H * DRAW_SCALE))
+
+    table = {
+        'tile': [TILE_W, TILE_H],
+        'chunkTiles': n,
+        'chunkSize': [width, height],
+        'origin': list(origin),
+        # floor texture key -> renderTile.variant -> chunk src
+        'textures': {},
+    }
+    entries = []
+
+    for key in keys:
+        if key not in manifest:
+            print(f"Skipping {key}: not in ASSET_MANIFEST")
+            continue
+        path = src_to_path(manifest[key])
+        try:
+            img = Image.open(path).convert("RGBA")
+        except Exception as e:
+            print(f"Skipping {key}: cannot load {path}: {e}")
+            continue
+
+        os.makedirs(out_dir, exist_ok=True)
+        chunk_srcs = {}
+        for variant in VARIANT_QUADRANTS:
+            tile = variant_tile(img, variant, draw_size)
+            report = check_seamless(tile)
+            status = "ok" if report['ok'] else "SEAM"
+            print(f"  {key} v{variant}: seam={report['seam']:.1f} coverage={report['coverage']:.2f} [{status}]")
+            if not report['ok'] and strict:
+                print(f"  Skipping {key} v{variant}: does not tile seamlessly")
+                continue
+
+            out_path = os.path.join(out_dir, f"{key}_v{variant}.png")
+            bake_chunk(tile, n).save(out_path, "PNG")
+            chunk_srcs[str(variant)] = path_to_src(out_path)
+            entries.append((f"chunk_{key}_v{variant}", path_to_src(out_path)))
+
+        if chunk_srcs:
+            table['textures'][key] = chunk_srcs
+            print(f"Baked {len(chunk_srcs)} {key} chunks ({width}x{height})")
+
+    table_path = os.path.join(out_dir, "floor_chunks.json")
+    os.makedirs(out_dir, exist_ok=True)
+    with open(table_path, "w") as f:
+        json.dump(table, f, indent=2)
+    print(f"Saved lookup table: {table_path}")
+
+    return entries
+
+
+if __name__ == "__main__":
+    out_dir = "public/sprites/chunks"
+    n = CHUNK_TILES
+    keys = []
+    strict = False
+    for arg in sys.argv[1:]:
+        if arg.startswith("--out="):
+            out_dir = arg.split("=", 1)[1]
+        elif arg.startswith("--tiles="):
+            n = int(arg.split("=")[1])
+        elif arg.startswith("--key="):
+            keys.append(arg.split("=")[1])
+        elif arg == "--strict":
+            strict = True
+        else:
+            print("Usage: python bake_floor_chunks.py [--out=public/sprites/chunks] [--tiles=8] [--key=floor_cave ...] [--strict]")
+            sys.exit(1)
+
+    entries = bake_floor_chunks(out_dir, keys or FLOOR_KEYS, n, strict)
+    if entries:
+        print("\n// ASSET_MANIFEST entries (src/data/assets.ts):")
+        for key, src in entries:
+            print(f"    {{ key: '{key}', src: '{src}' }},")
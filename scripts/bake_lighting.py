@@ -0,0 +1,148 @@
+from PIL import Image
+import numpy as np
+import json
+import math
+import sys
+import os
+
+# Renders the radial falloff sprites used by src/renderer/lighting.ts offline
+# and packs them into one small sheet + JSON metadata, so the lighting pass
+# can do fixed-size blits from a single image instead of building gradient
+# canvases on the first frame, rescaling them per light per frame and
+# creating a new radial gradient per item glow per frame.
+#
+# Every falloff is baked at the radius renderLighting draws it at. The torch
+# radius flickers between 280 and 283px: by default one frame is baked at
+# 283 and drawn at most 1.1% smaller; --torch-frames=N bakes up to 4 distinct
+# integer radii so the runtime can pick the nearest one and blit unscaled.
+
+SIZE = 96  # constants.ts SIZE
+
+# Colour stops copied from getLightSprite (offset, (r, g, b, a))
+SOFT_STOPS = [(0.0, (0, 0, 0, 1.0)), (0.5, (0, 0, 0, 1.0)), (1.0, (0, 0, 0, 0.0))]
+TORCH_STOPS = [(0.0, (255, 255, 200, 0.9)), (0.1, (255, 200, 50, 0.8)), (0.4, (255, 100, 0, 0.3)), (1.0, (0, 0, 0, 0.0))]
+
+# Item glows drawn with createRadialGradient every frame in renderLighting
+GLOWS = {
+    'potion': ((255, 80, 80, 0.5), 50),
+    'rare': ((80, 120, 255, 0.5), 60),
+    'epic': ((200, 80, 255, 0.6), 80),
+    'legendary': ((255, 220, 50, 0.7), 100),
+}
+
+# key -> (stops, radius renderLighting draws it at)
+FALLOFFS = {
+    'reveal': (SOFT_STOPS, SIZE),   # revealSize = SIZE * 2
+    'hole': (SOFT_STOPS, SIZE * 3), # playerRevealSize = SIZE * 6
+}
+
+# drawLight(SPRITE_TORCH, ..., 280 + flicker * 30), flicker in 0..0.1
+TORCH_RADIUS = 280
+TORCH_FLICKER = 3
+TORCH_FRAMES = 1
+
+SHEET_WIDTH = 1152  # hole + one torch frame side by side
+PADDING = 2
+
+
+def render_radial(radius, stops):
+    # Straight-alpha RGBA gradient, sampled at pixel centres like canvas does
+    size = int(math.ceil(radius * 2))
+    coords = np.arange(size, dtype=np.float32) + 0.5 - size / 2.0
+    d = np.sqrt(coords[None, :] ** 2 + coords[:, None] ** 2) / float(radius)
+
+    offsets = np.array([s[0] for s in stops], dtype=np.float32)
+    colors = np.array([s[1] for s in stops], dtype=np.float32)
+
+    out = np.empty((size, size, 4), dtype=np.float32)
+    for c in range(4):
+        # np.interp clamps past the last stop, same as canvas padding
+        out[..., c] = np.interp(d, offsets, colors[:, c])
+    out[..., 3] = out[..., 3] * 255.0
+
+    return Image.fromarray(np.clip(np.round(out), 0, 255).astype(np.uint8), "RGBA")
+
+
+def torch_radii(frames=TORCH_FRAMES):
+    # Distinct integer radii across the flicker range, largest first so a
+    # single frame is only ever scaled down
+    top = TORCH_RADIUS + TORCH_FLICKER
+    if frames <= 1:
+        return [top]
+    steps = np.linspace(top, TORCH_RADIUS, frames)
+    return sorted({int(round(r)) for r in steps}, reverse=True)
+
+
+def build_sprites(torch_frames=TORCH_FRAMES):
+    sprites = []  # (key, image, info)
+
+    for key, (stops, radius) in FALLOFFS.items():
+        sprites.append((key, render_radial(radius, stops), {'radius': radius}))
+
+    for i, radius in enumerate(torch_radii(torch_frames)):
+        sprites.append((f"torch_{i}", render_radial(radius, TORCH_STOPS), {'radius': radius}))
+
+    for name, (color, radius) in GLOWS.items():
+        stops = [(0.0, color), (1.0, (0, 0, 0, 0.0))]
+        sprites.append((f"glow_{name}", render_radial(radius, stops), {'radius': radius}))
+
+    return sprites
+
+
+def pack_shelves(sprites, sheet_width=SHEET_WIDTH, padding=PADDING):
+    # Simple shelf packer, tallest first
+    order = sorted(sprites, key=lambda s: -s[1].height)
+    placements = {}
+    x = y = shelf_h = 0
+    for key, img, _ in order:
+        w, h = img.size
+        if x + w > sheet_width:
+            x = 0
+            y += shelf_h + padding
+            shelf_h = 0
+        placements[key] = (x, y)
+        x += w + padding
+        shelf_h = max(shelf_h, h)
+    return placements, y + shelf_h
+
+
+def bake_lighting(out_path="public/sprites/lighting_sheet.png", torch_frames=TORCH_FRAMES):
+    sprites = build_sprites(torch_frames)
+    placements, height = pack_shelves(sprites)
+    width = max(placements[k][0] + img.width for k, img, _ in sprites)
+
+    sheet = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    # Torch frames by radius; pick the one nearest 280 + flicker * 30
+    meta = {'sprites': {}, 'torch': [k for k, _, _ in sprites if k.startswith('torch_')]}
+
+    for key, img, info in sprites:
+        x, y = placements[key]
+        sheet.paste(img, (x, y))
+        entry = {'x': x, 'y': y, 'w': img.width, 'h': img.height}
+        entry.update(info)
+        meta['sprites'][key] = entry
+
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    sheet.save(out_path, "PNG", optimize=True)
+    meta_path = os.path.splitext(out_path)[0] + ".json"
+    with open(meta_path, "w") as f:
+        json.dump(meta, f, indent=2)
+
+    decoded_kb = width * height * 4 / 1024
+    print(f"Saved {out_path} ({width}x{height}, {len(sprites)} sprites, {decoded_kb:.0f} KB decoded)")
+    print(f"Saved {meta_path}")
+
+
+if __name__ == "__main__":
+    out = "public/sprites/lighting_sheet.png"
+    torch_frames = TORCH_FRAMES
+    for arg in sys.argv[1:]:
+        if arg.startswith("--out="):
+            out = arg.split("=", 1)[1]
+        elif arg.startswith("--torch-frames="):
+            torch_frames = int(arg.split("=")[1])
+        else:
+            print("Usage: python bake_lighting.py [--out=public/sprites/lighting_sheet.png] [--torch-frames=1]")
+            sys.exit(1)
+
+    bake_lighting(out, torch_frames)
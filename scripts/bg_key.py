@@ -0,0 +1,166 @@
+import numpy as np
+
+# Background key estimation shared by the keying scripts ("auto" mode).
+#
+# Instead of trusting one corner pixel, every pixel in a band around the
+# image (or cell) border is histogrammed in one array pass. The dominant
+# colour cluster is taken as the background. Further clusters are only added
+# when they are as large as it and interleaved with it along the border
+# (checkerboards), not when they form long runs, which is what a sprite
+# touching the edge looks like. Confidence is how far the background
+# dominates the largest cluster that was left out.
+
+QUANT_SHIFT = 4         # 16 levels per channel -> 4096 bins
+MIN_SHARE = 0.08        # ignore clusters covering less of the border than this
+CONTEST_RATIO = 0.5     # clusters this large relative to the primary compete with it
+MIN_TOLERANCE = 10
+MAX_TOLERANCE = 120
+
+
+def border_pixels(arr, band=None):
+    h, w = arr.shape[:2]
+    band = border_band(arr, band)
+    parts = [
+        arr[:band].reshape(-1, arr.shape[2]),
+        arr[h - band:].reshape(-1, arr.shape[2]),
+        arr[band:h - band, :band].reshape(-1, arr.shape[2]),
+        arr[band:h - band, w - band:].reshape(-1, arr.shape[2]),
+    ]
+    return np.concatenate(parts)
+
+
+def border_band(arr, band=None):
+    h, w = arr.shape[:2]
+    if band is None:
+        band = max(2, int(round(min(h, w) * 0.03)))
+    return max(1, min(band, h // 2, w // 2))
+
+
+def border_ring(arr):
+    # Outermost pixels in clockwise order, for run-length checks
+    return np.concatenate([arr[0, :], arr[1:, -1], arr[-1, -2::-1], arr[-2:0:-1, 0]])
+
+
+def corner_pixels(arr, band):
+    return np.concatenate([arr[:band, :band].reshape(-1, arr.shape[2]),
+                           arr[:band, -band:].reshape(-1, arr.shape[2]),
+                           arr[-band:, :band].reshape(-1, arr.shape[2]),
+                           arr[-band:, -band:].reshape(-1, arr.shape[2])])
+
+
+def in_cluster(px, peak):
+    # Peak bin plus its immediate neighbours, so a colour sitting on a bin
+    # edge is not split in two
+    q = px[:, :3].astype(np.int32) >> QUANT_SHIFT
+    hit = np.abs(q - np.array(peak)).max(axis=1) <= 1
+    if px.shape[1] == 4:
+        hit &= px[:, 3] > 0
+    return hit
+
+
+def mean_run(hit):
+    # Average length of the circular runs of True in a border ring
+    if not hit.any():
+        return 0.0
+    if hit.all():
+        return float(len(hit))
+    starts = np.count_nonzero(hit & ~np.roll(hit, 1))
+    return hit.sum() / float(starts)
+
+
+def estimate_background(arr, band=None, max_colors=3):
+    # arr: uint8 array (h, w, 3|4). Returns
+    #   {'colors': [(r, g, b), ...], 'tolerance': int, 'confidence': float}
+    # Pixels that are already transparent are ignored; if the whole border is
+    # transparent there is nothing to key and 'colors' is empty.
+    arr = np.asarray(arr)
+    band = border_band(arr, band)
+    px = border_pixels(arr, band)
+    if px.shape[1] == 4:
+        px = px[px[:, 3] > 0]
+    if len(px) == 0:
+        return {'colors': [], 'tolerance': MIN_TOLERANCE, 'confidence': 1.0}
+
+    rgb = px[:, :3].astype(np.int32)
+    q = rgb >> QUANT_SHIFT
+    levels = 256 >> QUANT_SHIFT
+    bins = (q[:, 0] * levels + q[:, 1]) * levels + q[:, 2]
+    counts = np.bincount(bins, minlength=levels ** 3)
+
+    total = len(px)
+    remaining = np.ones(total, dtype=bool)
+    clusters = []  # dicts: peak, share, color, spread
+
+    # One more than max_colors so the largest rejected cluster is known
+    for _ in range(max_colors + 1):
+        if not remaining.any():
+            break
+        peak = int(np.argmax(counts))
+        if counts[peak] == 0:
+            break
+        peak_q = (peak // (levels * levels), (peak // levels) % levels, peak % levels)
+
+        members = remaining & in_cluster(px, peak_q)
+        share = members.sum() / float(total)
+        if clusters and share < MIN_SHARE:
+            break
+
+        center = rgb[members].mean(axis=0)
+        dist = np.sqrt(((rgb[members] - center) ** 2).sum(axis=1))
+        clusters.append({
+            'peak': peak_q,
+            'share': float(share),
+            'color': tuple(int(round(c)) for c in center),
+            'spread': float(np.percentile(dist, 95)) if len(dist) else 0.0,
+        })
+
+        remaining &= ~members
+        np.subtract.at(counts, bins[members], 1)
+
+    ring = border_ring(arr)
+    # Ring runs at least this short count as interleaved (checker squares)
+    max_run = max(8.0, len(ring) / 24.0)
+
+    def interleaved(cluster):
+        return mean_run(in_cluster(ring, cluster['peak'])) <= max_run
+
+    primary = clusters[0]
+    rivals = [c for c in clusters[1:] if c['share'] >= primary['share'] * CONTEST_RATIO]
+    if rivals and not interleaved(rivals[0]):
+        # Two large solid regions on the border: one is probably a sprite
+        # running off the edge. Backgrounds own the corners, sprites rarely do.
+        corners = corner_pixels(arr, band)
+        if in_cluster(corners, rivals[0]['peak']).sum() > in_cluster(corners, primary['peak']).sum():
+            primary, clusters = rivals[0], [rivals[0]] + [c for c in clusters if c is not rivals[0]]
+
+    accepted = [primary] + [c for c in clusters[1:]
+                            if c['share'] >= primary['share'] * CONTEST_RATIO and interleaved(c)]
+    accepted = accepted[:max_colors]
+    rejected = [c['share'] for c in clusters if c not in accepted]
+
+    colors = [c['color'] for c in accepted]
+    spread = max(c['spread'] for c in accepted)
+    tolerance = int(np.clip(spread * 1.5 + 8, MIN_TOLERANCE, MAX_TOLERANCE))
+
+    keyed = background_mask(px[:, None, :], {'colors': colors, 'tolerance': tolerance})[:, 0]
+    confidence = float(np.clip(keyed.mean() - max(rejected, default=0.0), 0.0, 1.0))
+
+    return {'colors': colors, 'tolerance': tolerance, 'confidence': confidence}
+
+
+def background_mask(arr, estimate):
+    # Boolean (h, w) mask of pixels within tolerance of any background colour
+    # (any leading shape works; arr's last axis is RGB or RGBA)
+    arr = np.asarray(arr)
+    rgb = arr[..., :3].astype(np.int32)
+    mask = np.zeros(arr.shape[:-1], dtype=bool)
+    tol_sq = estimate['tolerance'] ** 2
+    for color in estimate['colors']:
+        diff = rgb - np.array(color[:3], dtype=np.int32)
+        mask |= (diff * diff).sum(axis=-1) < tol_sq
+    return mask
+
+
+def describe(estimate):
+    colors = ", ".join(str(c) for c in estimate['colors']) or "none"
+    return f"bg=[{colors}] tol={estimate['tolerance']} confidence={estimate['confidence']:.2f}"
@@ -1,9 +1,8 @@
 from PIL import Image
 import os
 
-def fix_rat(path):
-    print(f"Fixing {path}...")
-    img = Image.open(path).convert("RGBA")
+def fix_rat_image(img):
+    img = img.convert("RGBA")
     pixels = img.load()
     w, h = img.size
     
@@ -37,6 +36,11 @@ def fix_rat(path):
                             count += 1
 
                          
+    return img, count
+
+def fix_rat(path):
+    print(f"Fixing {path}...")
+    img, count = fix_rat_image(Image.open(path))
     img.save(path)
     print(f"Fixed {path}, removed {count} pixels.")
 
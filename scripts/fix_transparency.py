@@ -1,74 +1,92 @@
 
 from PIL import Image
+import numpy as np
 import sys
 
-def remove_background(image_path, mode="auto"):
+from bg_key import estimate_background, background_mask, describe
+from stream_io import run_in_place
+
+def remove_background_image(img, mode="grid"):
+    img = img.convert("RGBA")
+    datas = img.getdata()
+
+    # Sample corners for background color if grid
+    width, height = img.size
+
+    if mode == "auto":
+        # Estimate background colour(s) and tolerance from the border
+        arr = np.array(img)
+        estimate = estimate_background(arr)
+        print(f"Mode AUTO: {describe(estimate)}")
+        if estimate['confidence'] < 0.5:
+            print("Warning: low confidence background estimate")
+        arr[background_mask(arr, estimate)] = 0
+        return Image.fromarray(arr, "RGBA")
+
+    targets = []
+    tolerance = 25 # Default tolerance
+
+    if mode == "black":
+        # Target pure black and very dark colors
+        targets.append((0, 0, 0, 255))
+        targets.append((0, 0, 0))
+        # Lower tolerance to avoid eating into dark forest sprites
+        tolerance = 10 
+        print("Mode BLACK: Targeting black background with strict tolerance.")
+    elif mode == "white":
+        # Target pure white
+        targets.append((255, 255, 255, 255))
+        targets.append((255, 255, 255))
+        tolerance = 60 # Increased tolerance for white/light artifacts
+        print("Mode WHITE: Targeting white background with strict tolerance.")
+    else:
+        # GRID mode
+        corners = [
+            datas[0],                   # Top-left
+            datas[width-1],             # Top-right
+            datas[(height-1)*width],    # Bottom-left
+            datas[len(datas)-1]         # Bottom-right
+        ]
+        for c in corners:
+            targets.append(c)
+
+        # Hardcode common grid colors
+        targets.append((255, 255, 255, 255))
+        targets.append((255, 255, 255)) 
+        targets.append((236, 236, 234, 255))
+        targets.append((180, 180, 180, 255))
+        targets.append((204, 204, 204, 255))
+        targets.append((240, 240, 240, 255))
+        print(f"Mode GRID: Sampled corners + Grid defaults: {targets}")
+
+    newData = []
+
+    for item in datas:
+        is_bg = False
+        for target in targets:
+            # Handle target vs item length mismatch
+            r_diff = item[0] - target[0]
+            g_diff = item[1] - target[1]
+            b_diff = item[2] - target[2]
+
+            dist_sq = r_diff*r_diff + g_diff*g_diff + b_diff*b_diff
+
+            if dist_sq < (tolerance * tolerance):
+                is_bg = True
+                break
+
+        if is_bg:
+            newData.append((0, 0, 0, 0)) # Transparent
+        else:
+            newData.append(item)
+
+    img.putdata(newData)
+    return img
+
+def remove_background(image_path, mode="grid"):
     print(f"Processing {image_path} with mode {mode}...")
     try:
-        img = Image.open(image_path).convert("RGBA")
-        datas = img.getdata()
-        
-        # Sample corners for background color if auto
-        width, height = img.size
-        
-        targets = []
-        tolerance = 25 # Default tolerance
-        
-        if mode == "black":
-            # Target pure black and very dark colors
-            targets.append((0, 0, 0, 255))
-            targets.append((0, 0, 0))
-            # Lower tolerance to avoid eating into dark forest sprites
-            tolerance = 10 
-            print("Mode BLACK: Targeting black background with strict tolerance.")
-        elif mode == "white":
-            # Target pure white
-            targets.append((255, 255, 255, 255))
-            targets.append((255, 255, 255))
-            tolerance = 60 # Increased tolerance for white/light artifacts
-            print("Mode WHITE: Targeting white background with strict tolerance.")
-        else:
-            # AUTO / GRID mode
-            corners = [
-                datas[0],                   # Top-left
-                datas[width-1],             # Top-right
-                datas[(height-1)*width],    # Bottom-left
-                datas[len(datas)-1]         # Bottom-right
-            ]
-            for c in corners:
-                targets.append(c)
-            
-            # Hardcode common grid colors
-            targets.append((255, 255, 255, 255))
-            targets.append((255, 255, 255)) 
-            targets.append((236, 236, 234, 255))
-            targets.append((180, 180, 180, 255))
-            targets.append((204, 204, 204, 255))
-            targets.append((240, 240, 240, 255))
-            print(f"Mode AUTO: Sampled corners + Grid defaults: {targets}")
-        
-        newData = []
-        
-        for item in datas:
-            is_bg = False
-            for target in targets:
-                # Handle target vs item length mismatch
-                r_diff = item[0] - target[0]
-                g_diff = item[1] - target[1]
-                b_diff = item[2] - target[2]
-                
-                dist_sq = r_diff*r_diff + g_diff*g_diff + b_diff*b_diff
-                
-                if dist_sq < (tolerance * tolerance):
-                    is_bg = True
-                    break
-            
-            if is_bg:
-                newData.append((0, 0, 0, 0)) # Transparent
-            else:
-                newData.append(item)
-        
-        img.putdata(newData)
+        img = remove_background_image(Image.open(image_path), mode)
         img.save(image_path, "PNG")
         print(f"Saved fixed image to {image_path}")
         
@@ -77,9 +95,11 @@ def remove_background(image_path, mode="auto"):
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python fix_transparency.py [--mode=black/auto] <file1> <file2> ...")
+        print("Usage: python fix_transparency.py [--mode=grid/auto/black/white] <file1> <file2> ...")
+        print("  grid (default): corner samples + checkerboard greys, the previous 'auto'")
+        print("  auto: background estimated from the border histogram")
     else:
-        mode = "auto"
+        mode = "grid"
         files = []
         for arg in sys.argv[1:]:
             if arg.startswith("--mode="):
@@ -87,5 +107,6 @@ if __name__ == "__main__":
             else:
                 files.append(arg)
                 
-        for f in files:
-            remove_background(f, mode)
+        print(f"Processing {len(files)} files with mode {mode}...")
+        run_in_place(files, lambda img: remove_background_image(img, mode),
+                     "Saved fixed image to {}", "Error processing {}: {}")
@@ -1,31 +1,133 @@
 from PIL import Image, ImageDraw
+from PIL.PngImagePlugin import PngInfo
+import sys
 import os
 
-def create_placeholder(filename, size, color, text=None):
-    img = Image.new('RGBA', size, (0, 0, 0, 0))
+from asset_manifest import load_manifest, src_to_path
+
+# Offline twin of src/engine/core/PlaceholderGenerator.ts: every manifest key
+# whose file is missing (or was written by this script before) gets a 3x4
+# directional sheet baked into public/sprites, so the browser never has to
+# rasterize placeholders or retry failed loads at startup.
+
+PLACEHOLDER_TAG = "cutre-placeholder"
+
+# Row order matches PlaceholderGenerator.ts / the default anims in sprites.ts
+DIRECTIONS = ['down', 'left', 'right', 'up']
+COLS = 3
+
+
+def key_color(key):
+    # Same hash as AssetLoader.createPlaceholder so colours match the runtime fallback
+    h = 0
+    for ch in key:
+        h = (ord(ch) + ((h << 5) - h)) & 0xFFFFFFFF
+    h &= 0x00FFFFFF
+    return ((h >> 16) & 0xFF, (h >> 8) & 0xFF, h & 0xFF, 255)
+
+
+def create_placeholder_sheet(color, frame_size=32):
+    # Frame geometry is expressed for 32px frames and scaled from there
+    s = frame_size / 32.0
+    width, height = frame_size * COLS, frame_size * len(DIRECTIONS)
+    img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
-    
-    # Draw simple shape
-    draw.rectangle([0, 0, size[0]-1, size[1]-1], fill=color, outline=(0,0,0,255))
-    
-    if text:
-        # Simple text representation (optional, might need font, skipping for simplicity)
-        pass
-        
-    # Ensure directory exists
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
-    img.save(filename)
-    print(f"Created {filename}")
-
-# Define assets
-assets = [
-    {'name': 'public/sprites/tree.png', 'size': (32, 48), 'color': (34, 139, 34, 255)}, # Green Tree
-    {'name': 'public/sprites/rock.png', 'size': (32, 32), 'color': (128, 128, 128, 255)}, # Grey Rock
-    {'name': 'public/sprites/dungeon_gate.png', 'size': (32, 32), 'color': (20, 20, 20, 255)}, # Dark Gate
-    {'name': 'public/sprites/floor_grass.png', 'size': (32, 32), 'color': (100, 200, 100, 255)}, # Light Green Grass
-    {'name': 'public/sprites/floor_dirt.png', 'size': (32, 32), 'color': (139, 69, 19, 255)}, # Brown Dirt
-    {'name': 'public/sprites/workbench.png', 'size': (32, 32), 'color': (160, 82, 45, 255)}, # Sienna Workbench
-]
-
-for asset in assets:
-    create_placeholder(asset['name'], asset['size'], asset['color'])
+
+    def rect(x, y, w, h, fill):
+        draw.rectangle([x, y, x + w * s - 1, y + h * s - 1], fill=fill)
+
+    for row, direction in enumerate(DIRECTIONS):
+        for col in range(COLS):
+            x = col * frame_size
+            y = row * frame_size
+
+            # Body
+            rect(x + 4 * s, y + 4 * s, 24, 24, color)
+
+            # Eyes so the facing direction is readable
+            if direction == 'down':
+                rect(x + 10 * s, y + 10 * s, 4, 4, (255, 255, 255, 255))
+                rect(x + 18 * s, y + 10 * s, 4, 4, (255, 255, 255, 255))
+            elif direction == 'left':
+                rect(x + 8 * s, y + 10 * s, 4, 4, (255, 255, 255, 255))
+            elif direction == 'right':
+                rect(x + 20 * s, y + 10 * s, 4, 4, (255, 255, 255, 255))
+
+            # "Animation" (legs)
+            if col == 1:
+                # rgba(0,0,0,0.3) blended over the body like the canvas version
+                shadow = Image.new('RGBA', (int(12 * s), int(4 * s)), (0, 0, 0, 77))
+                img.alpha_composite(shadow, dest=(int(x + 10 * s), int(y + 24 * s)))
+            elif col == 0:
+                rect(x + 8 * s, y + 28 * s, 6, 4, (0, 0, 0, 255))
+            else:
+                rect(x + 18 * s, y + 28 * s, 6, 4, (0, 0, 0, 255))
+
+    return img
+
+
+def is_placeholder(path):
+    try:
+        with Image.open(path) as img:
+            return PLACEHOLDER_TAG in img.info
+    except Exception:
+        return False
+
+
+def find_placeholder_targets(entries):
+    # Missing files and files we generated earlier; real art is never touched.
+    # SVG sources are skipped since Pillow cannot write them.
+    targets = {}
+    for entry in entries:
+        path = src_to_path(entry['src'])
+        if not path.lower().endswith(".png") or path in targets:
+            continue
+        if not os.path.exists(path) or is_placeholder(path):
+            targets[path] = entry['key']
+    return targets
+
+
+def generate_from_manifest(frame_size=32, dry_run=False):
+    entries = load_manifest()
+    targets = find_placeholder_targets(entries)
+
+    if not targets:
+        print("No missing or placeholder sprites in ASSET_MANIFEST.")
+        return []
+
+    # Render the whole batch first, then write
+    rendered = {}
+    sheets = {}
+    for path, key in targets.items():
+        color = key_color(key)
+        if color not in sheets:
+            sheets[color] = create_placeholder_sheet(color, frame_size)
+        rendered[path] = (key, sheets[color])
+
+    meta = PngInfo()
+    meta.add_text(PLACEHOLDER_TAG, "1")
+
+    for path, (key, sheet) in rendered.items():
+        if dry_run:
+            print(f"Would create {path} ({key})")
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        sheet.save(path, "PNG", pnginfo=meta)
+        print(f"Created {path} ({key})")
+
+    return list(rendered)
+
+
+if __name__ == "__main__":
+    frame = 32
+    dry_run = False
+    for arg in sys.argv[1:]:
+        if arg.startswith("--frame="):
+            frame = int(arg.split("=")[1])
+        elif arg == "--dry-run":
+            dry_run = True
+        else:
+            print("Usage: python generate_placeholders.py [--frame=32] [--dry-run]")
+            sys.exit(1)
+
+    generate_from_manifest(frame, dry_run)
@@ -0,0 +1,416 @@
+import hashlib
+import json
+import shutil
+import sqlite3
+import sys
+import os
+import tempfile
+import time
+
+from PIL import Image, ImageDraw
+
+from stitch_sprites import stitch_images
+from remove_bg import key_white_background
+from remove_bg_smart import remove_bg_smart_image
+from remove_bg_simple import remove_green_image
+from fix_transparency import remove_background_image
+from fix_rat import fix_rat_image
+from align_torch import align_torch_image
+from stabilize_torch import stabilize_torch_image
+from process_assets import process_asset_image
+from process_env import process_env_image
+from process_sprites import process_grid_rigid_image
+from stream_io import stream_process, load_image, DEFAULT_READERS, DEFAULT_WRITERS
+
+# Resumable job queue for long asset rebuilds.
+#
+# Every job (kind + inputs + output + params) is recorded in a local SQLite
+# database with its status, timing and the hashes of what it read and wrote.
+# Results are written to a staging area first and then moved over the output
+# with os.replace, so an interrupted run never leaves half-written sprites.
+# Running the queue again skips jobs whose output is still what we produced
+# and whose inputs have not changed, which also stops in-place jobs
+# (remove_bg, fix_rat, align_torch...) from reprocessing their own output.
+# Once a job reruns, every later job reading its output reruns too.
+# Decoding and PNG encoding overlap with the compute step (see stream_io.py).
+
+WORK_DIR = ".asset_jobs"
+DB_NAME = "jobs.sqlite"
+STAGING = "staging"
+
+# kind -> compute(images, params) returning the output Image (or None = failed)
+JOB_KINDS = {
+    'stitch': lambda imgs, p: stitch_images(
+        imgs[0], imgs[1] if len(imgs) > 1 else None, p.get('limit_cols'), p.get('key_mode', 'probe')),
+    'remove_bg': lambda imgs, p: key_white_background(imgs[0], p.get('key_mode', 'white')),
+    'remove_bg_smart': lambda imgs, p: remove_bg_smart_image(imgs[0], p.get('mode', 'corner')),
+    'remove_green': lambda imgs, p: remove_green_image(imgs[0], p.get('key_mode', 'green')),
+    'grid_rigid': lambda imgs, p: process_grid_rigid_image(imgs[0], p.get('key_mode', 'green')),
+    'fix_transparency': lambda imgs, p: remove_background_image(imgs[0], p.get('mode', 'grid')),
+    'fix_rat': lambda imgs, p: fix_rat_image(imgs[0])[0],
+    'align_torch': lambda imgs, p: align_torch_image(imgs[0], p.get('frames', 4)),
+    'stabilize_torch': lambda imgs, p: stabilize_torch_image(imgs[0], p.get('frames', 4)),
+    'process_asset': lambda imgs, p: process_asset_image(
+        imgs[0], tuple(p.get('target_size', (128, 128))), p.get('tolerance', 50)),
+    'process_env': lambda imgs, p: process_env_image(
+        imgs[0], p.get('target_width', 96), p.get('key_mode', 'white')),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_key TEXT UNIQUE NOT NULL,
+    kind TEXT NOT NULL,
+    inputs TEXT NOT NULL,
+    output TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    input_hash TEXT,
+    output_hash TEXT,
+    started REAL,
+    finished REAL,
+    duration REAL,
+    error TEXT
+);
+"""
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def inputs_hash(paths, known=None):
+    # known: {path: file hash} to use instead of reading the file
+    known = known or {}
+    h = hashlib.sha256()
+    for path in paths:
+        h.update(path.encode("utf-8"))
+        h.update((known.get(path) or file_hash(path)).encode("ascii"))
+    return h.hexdigest()
+
+
+def open_db(work_dir=WORK_DIR):
+    os.makedirs(os.path.join(work_dir, STAGING), exist_ok=True)
+    conn = sqlite3.connect(os.path.join(work_dir, DB_NAME))
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def add_job(conn, kind, inputs, output, params=None):
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind '{kind}' (expected one of: {', '.join(JOB_KINDS)})")
+    params = params or {}
+    inputs = [os.path.normpath(p) for p in inputs]
+    output = os.path.normpath(output)
+    spec = json.dumps([kind, inputs, output, params], sort_keys=True)
+    job_key = hashlib.sha256(spec.encode("utf-8")).hexdigest()
+    cur = conn.execute(
+        "INSERT OR IGNORE INTO jobs (job_key, kind, inputs, output, params) VALUES (?, ?, ?, ?, ?)",
+        (job_key, kind, json.dumps(inputs), output, json.dumps(params, sort_keys=True)))
+    conn.commit()
+    return cur.rowcount == 1
+
+
+def load_spec(conn, spec_path):
+    # spec: [{"kind": ..., "inputs": [...], "output": ..., "params": {...}}, ...]
+    with open(spec_path) as f:
+        jobs = json.load(f)
+    added = 0
+    for job in jobs:
+        if add_job(conn, job['kind'], job['inputs'], job['output'], job.get('params')):
+            added += 1
+    print(f"Queued {added} new jobs ({len(jobs) - added} already known)")
+
+
+def chain_hashes(conn, job):
+    # Hashes the file legitimately goes through after this in-place job:
+    # its own output, then each later in-place job on the same file for as
+    # long as that job consumed exactly the previous step's output
+    hashes = [job['output_hash']]
+    later = conn.execute("SELECT * FROM jobs WHERE output = ? AND id > ? AND status = 'done' ORDER BY id",
+                         (job['output'], job['id'])).fetchall()
+    for step in later:
+        step_inputs = json.loads(step['inputs'])
+        if job['output'] not in step_inputs:
+            break
+        expected = inputs_hash(step_inputs, {job['output']: hashes[-1]})
+        if step['input_hash'] != expected:
+            break
+        hashes.append(step['output_hash'])
+    return hashes
+
+
+def is_up_to_date(conn, job, inputs, dirty=()):
+    # A 'running' job with a recorded output hash was interrupted after its
+    # result was staged; it is done if that result made it into place
+    if job['status'] not in ('done', 'running') or not job['output_hash']:
+        return False
+    if not os.path.exists(job['output']) or set(inputs) & set(dirty):
+        return False
+    # Done while the file is this job's output, or the result of later
+    # in-place steps (fix_transparency after stitch...) applied on top of it
+    out_hash = file_hash(job['output'])
+    if job['status'] == 'running':
+        if out_hash != job['output_hash']:
+            return False
+    elif out_hash not in chain_hashes(conn, job):
+        return False
+    if job['output'] in inputs:
+        return True
+    return inputs_hash(inputs) == job['input_hash']
+
+
+def commit_file(staged, output):
+    out_dir = os.path.dirname(output)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    try:
+        os.replace(staged, output)
+    except OSError:
+        # Staging on another filesystem: copy next to the target, then swap
+        tmp = output + ".tmp"
+        shutil.copyfile(staged, tmp)
+        os.replace(tmp, output)
+        os.remove(staged)
+
+
+def stage_path(job_id, work_dir=WORK_DIR):
+    return os.path.join(work_dir, STAGING, f"job_{job_id}.png")
+
+
+def mark_running(conn, job, in_hash):
+    conn.execute("UPDATE jobs SET status = 'running', attempts = attempts + 1, started = ?, "
+                 "finished = NULL, error = NULL, input_hash = ?, output_hash = NULL WHERE id = ?",
+                 (time.time(), in_hash, job['id']))
+    conn.commit()
+
+
+def record_output(conn, job, output_hash):
+    # Recorded before the staged file is moved into place, so a crash between
+    # the two is recognised on resume instead of reprocessing the output
+    conn.execute("UPDATE jobs SET output_hash = ? WHERE id = ?", (output_hash, job['id']))
+    conn.commit()
+
+
+def mark_done(conn, job):
+    now = time.time()
+    started = conn.execute("SELECT started FROM jobs WHERE id = ?", (job['id'],)).fetchone()[0] or now
+    conn.execute("UPDATE jobs SET status = 'done', finished = ?, duration = ? WHERE id = ?",
+                 (now, now - started, job['id']))
+    conn.commit()
+
+
+def mark_failed(conn, job, error):
+    now = time.time()
+    started = conn.execute("SELECT started FROM jobs WHERE id = ?", (job['id'],)).fetchone()[0] or now
+    conn.execute("UPDATE jobs SET status = 'failed', error = ?, finished = ?, duration = ? WHERE id = ?",
+                 (error, now, now - started, job['id']))
+    conn.commit()
+
+
+def pending_jobs(conn, retry_failed=False):
+    statuses = ['pending', 'running', 'done'] + (['failed'] if retry_failed else [])
+    marks = ",".join("?" * len(statuses))
+    return conn.execute(f"SELECT * FROM jobs WHERE status IN ({marks}) ORDER BY id", statuses).fetchall()
+
+
+def job_batches(jobs):
+    # Split the job list wherever a job reads or rewrites a file produced
+    # earlier in the same batch, so prefetching never reads a stale input
+    batch = []
+    written = set()
+    for job in jobs:
+        inputs = set(json.loads(job['inputs']))
+        if batch and (inputs & written or job['output'] in written):
+            yield batch
+            batch = []
+            written = set()
+        batch.append(job)
+        written.add(job['output'])
+    if batch:
+        yield batch
+
+
+def run_batch(conn, jobs, work_dir=WORK_DIR, readers=DEFAULT_READERS, writers=DEFAULT_WRITERS,
+              dirty=None):
+    # Inputs are decoded on reader threads, the job runs here, and the PNG
+    # encode + hash happens on writer threads. Database updates and the final
+    # move into place stay on this thread. Rewritten outputs are added to
+    # `dirty`.
+    def load(job):
+        return [load_image(p) for p in json.loads(job['inputs'])]
+
+    def compute(job, images):
+        mark_running(conn, job, inputs_hash(json.loads(job['inputs'])))
+        result = JOB_KINDS[job['kind']](images, json.loads(job['params']))
+        if result is None:
+            raise RuntimeError("job produced no image")
+        return result
+
+    def save(job, result):
+        staged = stage_path(job['id'], work_dir)
+        result.save(staged, "PNG")
+        return staged, file_hash(staged)
+
+    done = failed = 0
+    for job, saved, error in stream_process(jobs, load, compute, save, readers, writers):
+        label = f"[{job['id']}] {job['kind']} -> {job['output']}"
+        if error is None:
+            staged, out_hash = saved
+            record_output(conn, job, out_hash)
+            commit_file(staged, job['output'])
+            mark_done(conn, job)
+            if dirty is not None:
+                dirty.add(job['output'])
+            done += 1
+            print(f"{label}: done")
+        else:
+            mark_failed(conn, job, str(error))
+            failed += 1
+            print(f"{label}: FAILED ({error})")
+    return done, failed
+
+
+def run_queue(conn, retry_failed=False, work_dir=WORK_DIR):
+    done = skipped = failed = 0
+    dirty = set()  # files rewritten during this run
+
+    try:
+        for batch in job_batches(pending_jobs(conn, retry_failed)):
+            runnable = []
+            for job in batch:
+                inputs = json.loads(job['inputs'])
+                missing = [p for p in inputs if not os.path.exists(p)]
+                if missing:
+                    mark_failed(conn, job, f"missing input: {', '.join(missing)}")
+                    print(f"[{job['id']}] {job['kind']} -> {job['output']}: FAILED (missing input)")
+                    failed += 1
+                elif is_up_to_date(conn, job, inputs, dirty):
+                    if job['status'] == 'running':
+                        mark_done(conn, job)
+                    skipped += 1
+                else:
+                    runnable.append(job)
+
+            batch_done, batch_failed = run_batch(conn, runnable, work_dir, dirty=dirty)
+            done += batch_done
+            failed += batch_failed
+    except KeyboardInterrupt:
+        # Jobs left 'running' are checked against their staged hash next run
+        print("\nInterrupted. Run again to resume.")
+
+    print(f"Finished: {done} run, {skipped} up to date, {failed} failed")
+    return done, skipped, failed
+
+
+def self_check():
+    # Runs small job chains in a temp dir and checks which steps rerun:
+    # (name, expected (run, up to date, failed) per queue run)
+    with tempfile.TemporaryDirectory() as root:
+        work_dir = os.path.join(root, WORK_DIR)
+        conn = open_db(work_dir)
+        raw, produced, inplace = (os.path.join(root, n) for n in ("raw.png", "out/p.png", "inplace.png"))
+
+        def paint(path, color):
+            img = Image.new("RGB", (64, 64), "white")
+            ImageDraw.Draw(img).rectangle((0, 0, 63, 8), fill=(0, 0, 0))
+            ImageDraw.Draw(img).ellipse((16, 16, 48, 48), fill=color)
+            img.save(path)
+
+        paint(raw, (200, 0, 0))
+        paint(inplace, (200, 0, 0))
+        # Producer followed by an in-place post-process of its output
+        add_job(conn, 'process_env', [raw], produced, {'target_width': 32})
+        add_job(conn, 'fix_transparency', [produced], produced, {'mode': 'black'})
+        # Pure in-place chain on one file
+        add_job(conn, 'remove_bg', [inplace], inplace)
+        add_job(conn, 'fix_transparency', [inplace], inplace, {'mode': 'black'})
+
+        steps = [
+            ("first run", None, (4, 0, 0)),
+            ("second run", None, (0, 4, 0)),
+            ("third run", None, (0, 4, 0)),
+            ("producer input changed", lambda: paint(raw, (0, 0, 200)), (2, 2, 0)),
+            ("in-place art replaced", lambda: paint(inplace, (0, 0, 200)), (2, 2, 0)),
+        ]
+        ok = True
+        for name, change, expected in steps:
+            if change:
+                change()
+            got = run_queue(conn, work_dir=work_dir)
+            status = "ok" if got == expected else f"FAILED (expected {expected})"
+            ok &= got == expected
+            print(f"check: {name}: {got} {status}")
+        conn.close()
+    return ok
+
+
+def print_status(conn):
+    for row in conn.execute("SELECT status, COUNT(*) AS n, SUM(duration) AS t FROM jobs GROUP BY status"):
+        print(f"{row['status']:>8}: {row['n']:4d} jobs  {row['t'] or 0:8.1f}s")
+    for row in conn.execute("SELECT id, kind, output, error FROM jobs WHERE status = 'failed' ORDER BY id"):
+        print(f"  [{row['id']}] {row['kind']} -> {row['output']}: {row['error']}")
+
+
+def parse_value(value):
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+USAGE = """Usage:
+  python job_queue.py add <kind> <output> <input> [<input> ...] [--param=value ...]
+  python job_queue.py load <jobs.json>
+  python job_queue.py run [--retry-failed]
+  python job_queue.py status
+  python job_queue.py reset [<job_id> ...]
+  python job_queue.py check
+
+Kinds: """ + ", ".join(JOB_KINDS)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(USAGE)
+        sys.exit(1)
+
+    command = sys.argv[1]
+    args = [a for a in sys.argv[2:] if not a.startswith("--")]
+    flags = [a for a in sys.argv[2:] if a.startswith("--")]
+    if command == "check":
+        sys.exit(0 if self_check() else 1)
+    conn = open_db()
+
+    if command == "add" and len(args) >= 3:
+        params = {}
+        for flag in flags:
+            name, _, value = flag[2:].partition("=")
+            params[name] = parse_value(value)
+        if add_job(conn, args[0], args[2:], args[1], params):
+            print("Queued.")
+        else:
+            print("Job already queued.")
+    elif command == "load" and args:
+        load_spec(conn, args[0])
+    elif command == "run":
+        _, _, failed = run_queue(conn, retry_failed="--retry-failed" in flags)
+        sys.exit(0 if failed == 0 else 1)
+
+    elif command == "status":
+        print_status(conn)
+    elif command == "reset":
+        if args:
+            conn.executemany("UPDATE jobs SET status = 'pending' WHERE id = ?", [(int(a),) for a in args])
+        else:
+            conn.execute("UPDATE jobs SET status = 'pending'")
+        conn.commit()
+        print("Reset.")
+    else:
+        print(USAGE)
+        sys.exit(1)
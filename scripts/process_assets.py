@@ -1,101 +1,189 @@
 from PIL import Image
+import numpy as np
 import sys
 import os
 
+from bg_key import estimate_background, background_mask, describe
+from proxy_decode import (safe_factor, load_source, decode_reduced, source_box,
+                          refine_edges, crop_resize, compare_outputs, within_tolerance,
+                          describe_diff)
+
 def is_white(r, g, b):
     # Check if pixel is close to white (Aggressive threshold for shadows)
     return r > 200 and g > 200 and b > 200
 
-def process_single_asset(input_path, output_path, target_size=(128, 128), tolerance=50):
+def background_colors(img, tolerance):
+    # -> (bg_colors, numeric tolerance)
+    pixels = img.load()
+    if tolerance == "auto":
+        # Background colour(s) and tolerance from the border histogram
+        estimate = estimate_background(np.asarray(img))
+        print(f"Estimated {describe(estimate)}")
+        return estimate['colors'] or [pixels[0, 0]], estimate['tolerance']
+    # Detected background color from top-left (usually white)
+    return [pixels[0, 0]], tolerance
+
+def key_asset_image(img, tolerance=50, bg_colors=None):
+    # Flood-fills the background in from the corners; modifies img in place
+    width, height = img.size
+    pixels = img.load()
+
+    if bg_colors is None:
+        bg_colors, tolerance = background_colors(img, tolerance)
+
+    # Euclidean distance helper
+    def color_dist(c1, c2):
+        return ((c1[0]-c2[0])**2 + (c1[1]-c2[1])**2 + (c1[2]-c2[2])**2)**0.5
+
+    def is_bg(c):
+        return any(color_dist(c, bg) < TOLERANCE for bg in bg_colors)
+
+    # Flood Fill to remove background
+    # Stack: (x, y)
+    stack = [(0, 0), (width-1, 0), (0, height-1), (width-1, height-1)]
+    visited = set()
+
+    # Initialize stack with corners
+    # Tolerance for shadows/compression artifacts
+    TOLERANCE = tolerance
+
+    valid_stack = []
+    for sx, sy in stack:
+        if is_bg(pixels[sx, sy]):
+            valid_stack.append((sx, sy))
+            visited.add((sx, sy))
+
+    # Iterative DFS
+    while valid_stack:
+        cx, cy = valid_stack.pop()
+        pixels[cx, cy] = (0, 0, 0, 0) # Make transparent
+
+        for dx, dy in [(-1,0), (1,0), (0,-1), (0,1)]:
+            nx, ny = cx + dx, cy + dy
+            if 0 <= nx < width and 0 <= ny < height:
+                if (nx, ny) not in visited:
+                    # Check if it matches BG color
+                    if is_bg(pixels[nx, ny]):
+                        visited.add((nx, ny))
+                        valid_stack.append((nx, ny))
+
+    return img
+
+def fit_to_target(cropped, target_size):
+    # Resize (Keep Aspect Ratio)
+    # bound to target_size
+    ratio = min(target_size[0] / cropped.width, target_size[1] / cropped.height)
+    new_w = int(cropped.width * ratio)
+    new_h = int(cropped.height * ratio)
+
+    return cropped.resize((new_w, new_h), Image.Resampling.LANCZOS)
+
+def process_asset_image(img, target_size=(128, 128), tolerance=50):
+    img = key_asset_image(img.convert("RGBA"), tolerance)
+    width, height = img.size
+    pixels = img.load()
+
+    # Re-scan for content bounds
+    min_x, max_x = width, 0
+    min_y, max_y = height, 0
+    has_content = False
+
+    for y in range(height):
+        for x in range(width):
+            r, g, b, a = pixels[x, y]
+
+            if a > 0:
+                if x < min_x: min_x = x
+                if x > max_x: max_x = x
+                if y < min_y: min_y = y
+                if y > max_y: max_y = y
+                has_content = True
+
+    if has_content:
+        # 2. Crop
+        cropped = img.crop((min_x, min_y, max_x + 1, max_y + 1))
+
+        # 3. Resize
+        return fit_to_target(cropped, target_size)
+
+    return None
+
+def process_asset_fast(input_path, target_size=(128, 128), tolerance=50):
+    # Same result as process_asset_image, but flood-fills a box-reduced (or
+    # JPEG draft) proxy ~2x the output size and only Lanczos-resamples the
+    # cropped content; edge pixels are re-keyed at detail resolution by
+    # refine_edges. Returns None when there is nothing to gain.
+    with Image.open(input_path) as probe:
+        src_size = probe.size  # header only
+    factor = safe_factor(src_size, target_size)
+    if factor == 1:
+        return None
+
+    # Decoded once (or a JPEG path for draft decodes) and reused below
+    source = load_source(input_path)
+    proxy, scale, detail = decode_reduced(source, factor)
+    bg_colors, tolerance = background_colors(proxy, tolerance)
+    bbox = key_asset_image(proxy, tolerance, bg_colors).getbbox()
+    if not bbox:
+        return None
+
+    # Re-pick the factor from the content size so small props on a big
+    # canvas still get 2x oversampling; the crop keeps a ring of background
+    # around the content so the corner flood fill still reaches it
+    content = ((bbox[2] - bbox[0]) * scale, (bbox[3] - bbox[1]) * scale)
+    content_factor = safe_factor(content, target_size)
+    if content_factor < factor:
+        proxy, scale, detail = decode_reduced(source, content_factor,
+                                              source_box(bbox, scale, margin=2))
+        bbox = key_asset_image(proxy, tolerance, bg_colors).getbbox()
+        if not bbox:
+            return None
+
+    # Edge pixels touching the fill get their exact coverage (the fill's
+    # connectivity is already settled at proxy resolution)
+    estimate = {'colors': bg_colors, 'tolerance': tolerance}
+    keyed, box = refine_edges(proxy, detail, lambda block: background_mask(block, estimate))
+    if box is None:
+        return None
+    w, h = box[2] - box[0], box[3] - box[1]
+    ratio = min(target_size[0] / w, target_size[1] / h)
+    return crop_resize(keyed, (int(w * ratio), int(h * ratio)), box)
+
+def process_single_asset(input_path, output_path, target_size=(128, 128), tolerance=50,
+                         fast=False, verify=False):
     try:
         print(f"Processing Asset: {input_path} with tolerance {tolerance}")
-        img = Image.open(input_path).convert("RGBA")
-        width, height = img.size
-        pixels = img.load()
-        
-        # Create new image
-        new_img = Image.new("RGBA", (width, height), (0, 0, 0, 0))
-        new_pixels = new_img.load()
-        
-        # Detected background color from top-left (usually white)
-        bg_color = pixels[0, 0]
-        
-        # Euclidean distance helper
-        def color_dist(c1, c2):
-            return ((c1[0]-c2[0])**2 + (c1[1]-c2[1])**2 + (c1[2]-c2[2])**2)**0.5
-
-        # Flood Fill to remove background
-        # Stack: (x, y)
-        stack = [(0, 0), (width-1, 0), (0, height-1), (width-1, height-1)] 
-        visited = set()
-        
-        # Initialize stack with corners
-        # Tolerance for shadows/compression artifacts
-        TOLERANCE = tolerance
-        
-        valid_stack = []
-        for sx, sy in stack:
-            if color_dist(pixels[sx, sy], bg_color) < TOLERANCE:
-                valid_stack.append((sx, sy))
-                visited.add((sx, sy))
-                
-        # Iterative DFS
-        while valid_stack:
-            cx, cy = valid_stack.pop()
-            pixels[cx, cy] = (0, 0, 0, 0) # Make transparent
-            
-            for dx, dy in [(-1,0), (1,0), (0,-1), (0,1)]:
-                nx, ny = cx + dx, cy + dy
-                if 0 <= nx < width and 0 <= ny < height:
-                    if (nx, ny) not in visited:
-                        # Check if it matches BG color
-                        if color_dist(pixels[nx, ny], bg_color) < TOLERANCE:
-                            visited.add((nx, ny))
-                            valid_stack.append((nx, ny))
-
-        # Re-scan for content bounds
-        min_x, max_x = width, 0
-        min_y, max_y = height, 0
-        has_content = False
-        
-        for y in range(height):
-            for x in range(width):
-                r, g, b, a = pixels[x, y]
-                
-                if a > 0:
-                    if x < min_x: min_x = x
-                    if x > max_x: max_x = x
-                    if y < min_y: min_y = y
-                    if y > max_y: max_y = y
-                    has_content = True
-        
-        if has_content:
-            # 2. Crop
-            cropped = img.crop((min_x, min_y, max_x + 1, max_y + 1))
-            
-            # 3. Resize (Keep Aspect Ratio)
-            # bound to target_size
-            ratio = min(target_size[0] / cropped.width, target_size[1] / cropped.height)
-            new_w = int(cropped.width * ratio)
-            new_h = int(cropped.height * ratio)
-            
-            resized = cropped.resize((new_w, new_h), Image.Resampling.LANCZOS)
-            
+        resized = process_asset_fast(input_path, target_size, tolerance) if fast or verify else None
+        if verify and resized is not None:
+            exact = process_asset_image(Image.open(input_path), target_size, tolerance)
+            diff = compare_outputs(resized, exact) if exact is not None else None
+            if within_tolerance(diff):
+                print(f"Fast path within tolerance ({describe_diff(diff)})")
+            else:
+                print(f"Fast path out of tolerance ({describe_diff(diff)}), keeping full-resolution result")
+                resized = exact
+        elif resized is None:
+            resized = process_asset_image(Image.open(input_path), target_size, tolerance)
+
+        if resized is not None:
             # 4. Save
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
             resized.save(output_path, "PNG")
             print(f"Saved processed asset to: {output_path}")
         else:
             print("Error: Image appears empty (all white?)")
-            
+
     except Exception as e:
         print(f"Error processing {input_path}: {e}")
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: python process_assets.py <input_path> <output_path> [tolerance]")
+    fast = "--fast" in sys.argv[1:]
+    verify = "--verify" in sys.argv[1:]
+    args = [a for a in sys.argv[1:] if a not in ("--fast", "--verify")]
+    if len(args) < 2:
+        print("Usage: python process_assets.py [--fast|--verify] <input_path> <output_path> [tolerance|auto]")
     else:
         tol = 50
-        if len(sys.argv) > 3:
-            tol = int(sys.argv[3])
-        process_single_asset(sys.argv[1], sys.argv[2], tolerance=tol)
+        if len(args) > 2:
+            tol = args[2] if args[2] == "auto" else int(args[2])
+        process_single_asset(args[0], args[1], tolerance=tol, fast=fast, verify=verify)
@@ -1,47 +1,142 @@
 from PIL import Image
+import numpy as np
 import sys
 import os
 
-def process_env_sprite(input_path, output_path, target_width=96):
+from bg_key import estimate_background, background_mask, describe
+from proxy_decode import (safe_factor, load_source, decode_reduced, source_box,
+                          refine_edges, crop_resize, compare_outputs, within_tolerance,
+                          describe_diff)
+
+def key_env_image(img, key_mode="white", estimate=None):
+    img = img.convert("RGBA")
+
+    if key_mode == "auto":
+        arr = np.array(img)
+        if estimate is None:
+            estimate = estimate_background(arr)
+            print(f"Estimated {describe(estimate)}")
+        arr[background_mask(arr, estimate)] = 0
+        return Image.fromarray(arr, "RGBA")
+
+    datas = img.getdata()
+
+    newData = []
+    for item in datas:
+        # Simple white chroma key (tolerance)
+        if item[0] > 240 and item[1] > 240 and item[2] > 240:
+            newData.append((255, 255, 255, 0))
+        else:
+            newData.append(item)
+
+    img.putdata(newData)
+    return img
+
+def resize_to_width(img, target_width):
+    w_percent = (target_width / float(img.size[0]))
+    h_size = int((float(img.size[1]) * float(w_percent)))
+    return img.resize((target_width, h_size), Image.Resampling.LANCZOS)
+
+def process_env_image(img, target_width=96, key_mode="white"):
+    img = key_env_image(img, key_mode)
+
+    # Crop
+    bbox = img.getbbox()
+    if bbox:
+        img = img.crop(bbox)
+
+    # Resize
+    return resize_to_width(img, target_width)
+
+def process_env_fast(input_path, target_width=96, key_mode="white"):
+    # Same result as process_env_image, but keys a box-reduced (or JPEG
+    # draft) proxy ~2x the output size and only Lanczos-resamples the
+    # cropped content; edge pixels are re-keyed at detail resolution by
+    # refine_edges. Returns None when there is nothing to gain.
+    with Image.open(input_path) as probe:
+        src_size = probe.size  # header only
+    factor = safe_factor(src_size, (target_width, None))
+    if factor == 1:
+        return None
+
+    # Decoded once (or a JPEG path for draft decodes) and reused below
+    source = load_source(input_path)
+    proxy, scale, detail = decode_reduced(source, factor)
+    estimate = None
+    if key_mode == "auto":
+        estimate = estimate_background(np.asarray(proxy))
+        print(f"Estimated {describe(estimate)}")
+    keyed = key_env_image(proxy, key_mode, estimate)
+    bbox = keyed.getbbox()
+    if not bbox:
+        return None
+
+    # The content is usually smaller than the canvas: re-pick the factor from
+    # its size so thin props still get 2x oversampling
+    content = ((bbox[2] - bbox[0]) * scale, (bbox[3] - bbox[1]) * scale)
+    content_factor = safe_factor(content, (target_width, None))
+    if content_factor < factor:
+        proxy, scale, detail = decode_reduced(source, content_factor,
+                                              source_box(bbox, scale))
+        keyed = key_env_image(proxy, key_mode, estimate)
+        bbox = keyed.getbbox()
+        if not bbox:
+            return None
+
+    if key_mode == "auto":
+        is_bg = lambda block: background_mask(block, estimate)
+    else:
+        is_bg = lambda block: (block[..., :3] > 240).all(axis=-1)
+    keyed, box = refine_edges(keyed, detail, is_bg)
+    if box is None:
+        return None
+    w, h = box[2] - box[0], box[3] - box[1]
+    return crop_resize(keyed, (target_width, int(h * (target_width / w))), box)
+
+def process_env_sprite(input_path, output_path, target_width=96, key_mode="white",
+                       fast=False, verify=False):
     print(f"Processing {input_path}...")
     try:
-        img = Image.open(input_path).convert("RGBA")
-        datas = img.getdata()
-        
-        newData = []
-        for item in datas:
-            # Simple white chroma key (tolerance)
-            if item[0] > 240 and item[1] > 240 and item[2] > 240:
-                newData.append((255, 255, 255, 0))
+        img = process_env_fast(input_path, target_width, key_mode) if fast or verify else None
+        if verify and img is not None:
+            exact = process_env_image(Image.open(input_path), target_width, key_mode)
+            diff = compare_outputs(img, exact)
+            if within_tolerance(diff):
+                print(f"Fast path within tolerance ({describe_diff(diff)})")
             else:
-                newData.append(item)
-        
-        img.putdata(newData)
-        
-        # Crop
-        bbox = img.getbbox()
-        if bbox:
-            img = img.crop(bbox)
-        
-        # Resize
-        w_percent = (target_width / float(img.size[0]))
-        h_size = int((float(img.size[1]) * float(w_percent)))
-        img = img.resize((target_width, h_size), Image.Resampling.LANCZOS)
-        
+                print(f"Fast path out of tolerance ({describe_diff(diff)}), keeping full-resolution result")
+                img = exact
+        if img is None:
+            img = process_env_image(Image.open(input_path), target_width, key_mode)
+
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         img.save(output_path)
-        print(f"Saved {output_path} ({target_width}x{h_size})")
-        
+        print(f"Saved {output_path} ({img.width}x{img.height})")
+
     except Exception as e:
         print(f"Error processing {input_path}: {e}")
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: python process_env.py <input> <output> [width]")
+    key_mode = "white"
+    fast = False
+    verify = False
+    args = []
+    for arg in sys.argv[1:]:
+        if arg.startswith("--key="):
+            key_mode = arg.split("=")[1]
+        elif arg == "--fast":
+            fast = True
+        elif arg == "--verify":
+            verify = True
+        else:
+            args.append(arg)
+
+    if len(args) < 2:
+        print("Usage: python process_env.py [--key=white/auto] [--fast|--verify] <input> <output> [width]")
         sys.exit(1)
         
-    in_path = sys.argv[1]
-    out_path = sys.argv[2]
-    width = int(sys.argv[3]) if len(sys.argv) > 3 else 96
+    in_path = args[0]
+    out_path = args[1]
+    width = int(args[2]) if len(args) > 2 else 96
     
-    process_env_sprite(in_path, out_path, width)
+    process_env_sprite(in_path, out_path, width, key_mode, fast, verify)
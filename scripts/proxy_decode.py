@@ -0,0 +1,210 @@
+from PIL import Image
+import numpy as np
+
+# Reduced-resolution decoding for the downscaling scripts.
+#
+# process_env.py and process_assets.py turn 1024px+ renders into sprites of
+# ~100px, but used to key the full-resolution image first. These helpers let
+# them key a proxy that is only ~2x the final size: JPEGs are decoded at 1/2,
+# 1/4 or 1/8 scale (draft mode), everything else is decoded once, and both
+# are box-reduced by an integer factor. Only the pixels along the key edge
+# are re-keyed at the higher resolution (refine_edges).
+#
+# The callers keep the full-resolution path as the default; --verify runs
+# both and keeps the fast result only when compare_outputs is within the
+# edge tolerance below.
+
+# The proxy keeps at least this many pixels per output pixel, so the final
+# Lanczos is always a real downscale and key edges land inside the filter
+MIN_OVERSAMPLE = 2
+
+# JPEG drafts stop this many times above the proxy resolution so
+# refine_edges still has detail pixels to measure edge coverage from
+EDGE_DETAIL = 4
+
+# Allowed difference (0-255) between fast and exact output on the alpha edge
+# band (see compare_outputs), for both alpha and premultiplied colour
+EDGE_MEAN_TOLERANCE = 4.0
+EDGE_P99_TOLERANCE = 32.0
+
+
+def safe_factor(content_size, target_size):
+    # Largest integer reduction that still leaves MIN_OVERSAMPLE x the output.
+    # target_size entries may be None (unconstrained axis, e.g. env height).
+    ratios = [c / t for c, t in zip(content_size, target_size) if t]
+    if not ratios:
+        return 1
+    # Output is bounded by the tightest axis, i.e. the largest source/target
+    return max(1, int(max(ratios) / MIN_OVERSAMPLE))
+
+
+def load_source(path):
+    # JPEGs stay a path so every decode_reduced call can use draft mode;
+    # anything else is decoded once here and reused for each reduction
+    with Image.open(path) as img:
+        if img.format == "JPEG":
+            return path
+        return img.convert("RGBA")
+
+
+def decode_reduced(source, factor, box=None):
+    # Shrink `source` (a load_source result) by `factor`, optionally cropped
+    # to `box` (given in source pixels). Returns (RGBA proxy, source pixels
+    # per proxy pixel, detail) where detail is (the crop before the integer
+    # reduce, proxy pixel size in it) for refine_edges.
+    if isinstance(source, Image.Image):
+        img = source
+        src_w, src_h = img.size
+    else:
+        img = Image.open(source)
+        src_w, src_h = img.size
+        if factor > 1 and img.format == "JPEG":
+            # DCT scaling picks the largest of 1/2..1/8 that stays >= the request
+            img.draft("RGB", (src_w * EDGE_DETAIL // factor, src_h * EDGE_DETAIL // factor))
+        img = img.convert("RGBA")
+    draft_scale = src_w / img.width
+
+    rest = max(1, int(factor / draft_scale))
+    if box is None:
+        box = (0, 0, src_w, src_h)
+    # Align the crop to whole proxy pixels so the reduce never straddles it
+    step = draft_scale * rest
+    x0 = max(0, int(box[0] // step) * step)
+    y0 = max(0, int(box[1] // step) * step)
+    x1 = min(src_w, -(-box[2] // step) * step)
+    y1 = min(src_h, -(-box[3] // step) * step)
+
+    detail = img.crop((round(x0 / draft_scale), round(y0 / draft_scale),
+                       round(x1 / draft_scale), round(y1 / draft_scale)))
+    proxy = detail.reduce(rest) if rest > 1 else detail.copy()
+    return proxy, step, (detail, rest)
+
+
+def refine_edges(keyed, detail, is_bg):
+    # A keyed proxy is all-or-nothing per pixel, so its edges sit up to a
+    # proxy pixel off and carry background colour. Re-key just the pixels on
+    # either side of the key boundary at detail resolution (is_bg maps an
+    # (..., 4) array to a background mask) and give each its real coverage
+    # and foreground colour, i.e. what box-reducing the exactly keyed image
+    # would give. Returns (refined proxy, content box in proxy pixels as
+    # floats, matching the exact path's crop) or (keyed, None) when empty.
+    detail, rest = detail
+    arr = np.array(keyed.convert("RGBA"))
+    h, w = arr.shape[:2]
+    opaque = arr[..., 3] > 0
+    if not opaque.any():
+        return keyed, None
+
+    src = np.zeros((h * rest, w * rest, 4), dtype=np.uint8)
+    valid = np.zeros((h * rest, w * rest), dtype=bool)
+    src[:detail.height, :detail.width] = np.asarray(detail.convert("RGBA"))
+    valid[:detail.height, :detail.width] = True
+
+    ys, xs = np.nonzero(edge_band(opaque))
+    blocks = src.reshape(h, rest, w, rest, 4).swapaxes(1, 2)[ys, xs]
+    inside = valid.reshape(h, rest, w, rest).swapaxes(1, 2)[ys, xs]
+    fg = inside & ~is_bg(blocks)
+    weight = np.where(fg, blocks[..., 3], 0).astype(np.float32)
+    total = weight.sum(axis=(1, 2))
+    color = (blocks[..., :3] * weight[..., None]).sum(axis=(1, 2)) / np.maximum(total, 1)[:, None]
+    coverage = total / inside.sum(axis=(1, 2))
+
+    arr[ys, xs, :3] = np.where(total[:, None] > 0, np.round(color), 0)
+    arr[ys, xs, 3] = np.round(coverage)
+
+    # Content box: refined pixels by their foreground detail pixels, the
+    # untouched interior by whole proxy pixels
+    left, top, right, bottom = w * rest, h * rest, 0, 0
+    hit = fg & (blocks[..., 3] > 0)
+    if hit.any():
+        n, by, bx = np.nonzero(hit)
+        gy, gx = ys[n] * rest + by, xs[n] * rest + bx
+        left, top = gx.min(), gy.min()
+        right, bottom = gx.max() + 1, gy.max() + 1
+    core_y, core_x = np.nonzero(opaque & ~edge_band(opaque))
+    if len(core_y):
+        left, top = min(left, core_x.min() * rest), min(top, core_y.min() * rest)
+        right = max(right, (core_x.max() + 1) * rest)
+        bottom = max(bottom, (core_y.max() + 1) * rest)
+    if right <= left or bottom <= top:
+        return keyed, None
+    return Image.fromarray(arr, "RGBA"), tuple(v / rest for v in (left, top, right, bottom))
+
+
+def crop_resize(img, size, box):
+    # Lanczos-resample the float `box` of img to `size` like the exact path
+    # resizes its tight crop: cut to the whole pixels around the box first so
+    # the filter sees the same (clipped) support at the content edge
+    x0, y0 = int(box[0]), int(box[1])
+    x1, y1 = -int(-box[2] // 1), -int(-box[3] // 1)
+    arr = np.array(img.crop((x0, y0, x1, y1)), dtype=np.float32)
+    # Pixels straddling the box hold coverage of their inside part only;
+    # spread it over that part as the exact crop's edge pixels would
+    inside_x = np.ones(x1 - x0, dtype=np.float32)
+    inside_y = np.ones(y1 - y0, dtype=np.float32)
+    inside_x[0] -= box[0] - x0
+    inside_x[-1] -= x1 - box[2]
+    inside_y[0] -= box[1] - y0
+    inside_y[-1] -= y1 - box[3]
+    inside = np.maximum(inside_y[:, None] * inside_x[None, :], 1e-3)
+    arr[..., 3] = np.minimum(arr[..., 3] / inside, 255)
+    crop = Image.fromarray(np.round(arr).astype(np.uint8), "RGBA")
+    return crop.resize(size, Image.Resampling.LANCZOS,
+                       box=(box[0] - x0, box[1] - y0, box[2] - x0, box[3] - y0))
+
+
+def source_box(bbox, scale, origin=(0, 0), margin=1):
+    # Proxy bbox -> source pixels, grown by `margin` proxy pixels because the
+    # reduce blends content into the neighbouring proxy pixel
+    return (origin[0] + (bbox[0] - margin) * scale,
+            origin[1] + (bbox[1] - margin) * scale,
+            origin[0] + (bbox[2] + margin) * scale,
+            origin[1] + (bbox[3] + margin) * scale)
+
+
+def edge_band(alpha):
+    # Pixels whose 3x3 neighbourhood is not uniformly transparent or opaque:
+    # the anti-aliased rim where a proxy key differs from the exact one
+    pad = np.pad(alpha, 1, mode="edge")
+    h, w = alpha.shape
+    shifts = [pad[dy:dy + h, dx:dx + w] for dy in range(3) for dx in range(3)]
+    return np.maximum.reduce(shifts) != np.minimum.reduce(shifts)
+
+
+def compare_outputs(fast, exact):
+    # Absolute alpha / premultiplied colour difference (0-255) between the
+    # two outputs, or None when their sizes differ by more than 1px. Interior
+    # pixels agree almost exactly, so besides the whole-image mean this
+    # reports the mean, 99th percentile and max over the alpha edge band.
+    if max(abs(f - e) for f, e in zip(fast.size, exact.size)) > 1:
+        return None
+    if fast.size != exact.size:
+        fast = fast.resize(exact.size, Image.Resampling.LANCZOS)
+    a = np.asarray(fast.convert("RGBA"), dtype=np.float32)
+    b = np.asarray(exact.convert("RGBA"), dtype=np.float32)
+    alpha = np.abs(a[..., 3] - b[..., 3])
+    color = np.abs(a[..., :3] * a[..., 3:] - b[..., :3] * b[..., 3:]).max(axis=-1) / 255.0
+    band = edge_band(a[..., 3]) | edge_band(b[..., 3])
+    if not band.any():
+        band = np.ones_like(band)
+
+    def stats(d):
+        edge = d[band]
+        return {'mean': float(d.mean()), 'edge_mean': float(edge.mean()),
+                'edge_p99': float(np.percentile(edge, 99)), 'edge_max': float(edge.max())}
+    return {'alpha': stats(alpha), 'color': stats(color)}
+
+
+def within_tolerance(diff):
+    return diff is not None and all(
+        diff[channel]['edge_mean'] <= EDGE_MEAN_TOLERANCE
+        and diff[channel]['edge_p99'] <= EDGE_P99_TOLERANCE
+        for channel in ('alpha', 'color'))
+
+
+def describe_diff(diff):
+    if diff is None:
+        return "size mismatch"
+    return ", ".join(
+        f"{channel} edge mean {d['edge_mean']:.2f} p99 {d['edge_p99']:.1f} max {d['edge_max']:.0f}"
+        for channel, d in diff.items())
@@ -0,0 +1,140 @@
+from PIL import Image
+import hashlib
+import io
+import re
+import sys
+import os
+
+from asset_manifest import MANIFEST_PATH, load_manifest, src_to_path, path_to_src
+
+# Publishes every ASSET_MANIFEST sprite under a content-hashed filename
+# (goblin.png -> goblin.3f9a0c12de.png) and rewrites the manifest src paths,
+# so /sprites/* can be served with "Cache-Control: immutable" and repeat
+# startups make no sprite requests at all.
+#
+# PNGs are re-encoded deterministically (RGBA, no metadata, fixed zlib
+# settings) so identical pixels always produce identical bytes and the same
+# name. Other formats are hashed as-is.
+
+HASH_LEN = 10
+HASHED_RE = re.compile(r"\.([0-9a-f]{%d})$" % HASH_LEN)
+
+
+def split_hashed(path):
+    # 'sprites/goblin.3f9a0c12de.png' -> ('sprites/goblin', '.png')
+    base, ext = os.path.splitext(path)
+    return HASHED_RE.sub("", base), ext
+
+
+def deterministic_png(path):
+    with Image.open(path) as img:
+        img = img.convert("RGBA")
+        # Fresh image: drops text chunks, gamma, ICC and other metadata
+        clean = Image.frombytes("RGBA", img.size, img.tobytes())
+    buf = io.BytesIO()
+    clean.save(buf, "PNG", optimize=False, compress_level=9)
+    return buf.getvalue()
+
+
+def publish_file(path):
+    # Returns the hashed path, writing it if it does not exist yet
+    stem, ext = split_hashed(path)
+
+    # Prefer freshly processed art under the stable name over an older
+    # published copy
+    source = stem + ext if os.path.exists(stem + ext) else path
+    if ext.lower() == ".png":
+        data = deterministic_png(source)
+    else:
+        with open(source, "rb") as f:
+            data = f.read()
+
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LEN]
+    hashed = f"{stem}.{digest}{ext}"
+    if not os.path.exists(hashed):
+        tmp = hashed + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, hashed)
+    return hashed
+
+
+def stale_versions(hashed_paths):
+    # Older hashed copies of the same stems that the manifest no longer uses
+    live = set(hashed_paths)
+    stale = []
+    for path in live:
+        stem, ext = split_hashed(path)
+        folder = os.path.dirname(path) or "."
+        prefix = os.path.basename(stem) + "."
+        for name in os.listdir(folder):
+            candidate = os.path.normpath(os.path.join(folder, name))
+            if (name.startswith(prefix) and candidate not in live
+                    and split_hashed(candidate) == (stem, ext) and candidate != stem + ext):
+                stale.append(candidate)
+    return sorted(set(stale))
+
+
+def rewrite_manifest(replacements, manifest_path=MANIFEST_PATH):
+    # replacements: {line_number: (old_src, new_src)}
+    with open(manifest_path, encoding="utf-8") as f:
+        lines = f.readlines()
+    changed = 0
+    for lineno, (old, new) in replacements.items():
+        line = lines[lineno - 1]
+        updated = line.replace(f"'{old}'", f"'{new}'", 1)
+        if updated != line:
+            lines[lineno - 1] = updated
+            changed += 1
+    if changed:
+        tmp = manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        os.replace(tmp, manifest_path)
+    return changed
+
+
+def publish(dry_run=False, prune=False):
+    entries = load_manifest()
+    published = {}
+    replacements = {}
+
+    for entry in entries:
+        path = os.path.normpath(src_to_path(entry['src']))
+        stem, ext = split_hashed(path)
+        if not os.path.exists(path) and not os.path.exists(stem + ext):
+            print(f"Skipping {entry['key']}: {entry['src']} not found")
+            continue
+
+        if path not in published:
+            published[path] = path if dry_run else publish_file(path)
+        new_src = path_to_src(published[path])
+        if new_src != entry['src']:
+            replacements[entry['line']] = (entry['src'], new_src)
+            print(f"{entry['key']}: {entry['src']} -> {new_src}")
+
+    if dry_run:
+        print(f"Dry run: {len(published)} files would be published")
+        return
+
+    changed = rewrite_manifest(replacements)
+    print(f"Published {len(published)} files, updated {changed} manifest entries")
+
+    stale = stale_versions(published.values())
+    for path in stale:
+        if prune:
+            os.remove(path)
+            print(f"Removed stale {path}")
+        else:
+            print(f"Stale (use --prune to delete): {path}")
+
+
+if __name__ == "__main__":
+    dry_run = "--dry-run" in sys.argv[1:]
+    prune = "--prune" in sys.argv[1:]
+    unknown = [a for a in sys.argv[1:] if a not in ("--dry-run", "--prune")]
+    if unknown:
+        print("Usage: python publish_assets.py [--dry-run] [--prune]")
+        sys.exit(1)
+
+    publish(dry_run, prune)
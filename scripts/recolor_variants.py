@@ -0,0 +1,193 @@
+from PIL import Image
+import numpy as np
+import json
+import sys
+import os
+
+# Enemies that getSpriteForEnemy currently maps onto a shared texture.
+# Each recipe bakes a distinct sheet from the base so the renderer never has
+# to tint or filter at draw time.
+#
+# Recipe fields (all optional except "base"):
+#   hue        -> hue rotation in degrees
+#   saturation -> saturation multiplier
+#   palette    -> list of [from_rgb, to_rgb, tolerance] remaps (applied first)
+#   tint       -> per-channel RGB multipliers
+#   gamma      -> luminance curve exponent (>1 darker, <1 brighter)
+#   contrast   -> contrast around mid grey
+#   lift       -> added to every channel after the curve (0-255 scale)
+#   alpha      -> opacity multiplier (ghostly enemies)
+#   scale      -> scales the frame contents around the cell's bottom centre
+RECIPES = {
+    'orc': {'base': 'goblin', 'hue': -25, 'saturation': 0.85, 'gamma': 1.1, 'tint': (1.0, 0.95, 0.85)},
+    'troll': {'base': 'goblin', 'hue': 40, 'saturation': 0.6, 'gamma': 1.2, 'tint': (0.85, 0.95, 1.05), 'scale': 1.1},
+    'demon': {'base': 'goblin', 'hue': -100, 'saturation': 1.4, 'contrast': 1.15, 'tint': (1.15, 0.8, 0.8)},
+    'golem': {'base': 'goblin', 'saturation': 0.0, 'gamma': 0.9, 'tint': (0.9, 0.85, 0.8), 'lift': 10},
+    'orc_warlord': {'base': 'goblin', 'hue': -35, 'saturation': 1.1, 'contrast': 1.2, 'tint': (1.1, 0.9, 0.8), 'scale': 1.15},
+    'zombie': {'base': 'skeleton', 'hue': 80, 'saturation': 1.6, 'gamma': 1.15, 'tint': (0.8, 1.0, 0.75)},
+    'wraith': {'base': 'skeleton', 'saturation': 0.3, 'gamma': 0.85, 'tint': (0.75, 0.85, 1.2), 'alpha': 0.7},
+    'skeleton_lord': {'base': 'skeleton', 'hue': 200, 'saturation': 1.5, 'contrast': 1.25, 'tint': (1.05, 0.95, 1.2), 'scale': 1.15},
+}
+
+# Stitched enemy sheets are 256px cells (see stitch_sprites.py)
+CELL_SIZE = 256
+
+
+def rgb_to_hsv(rgb):
+    # rgb: float array (..., 3) in [0, 1]
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    maxc = rgb.max(axis=-1)
+    minc = rgb.min(axis=-1)
+    delta = maxc - minc
+    safe = np.where(delta == 0, 1, delta)
+
+    h = np.zeros_like(maxc)
+    h = np.where(maxc == r, ((g - b) / safe) % 6, h)
+    h = np.where(maxc == g, (b - r) / safe + 2, h)
+    h = np.where(maxc == b, (r - g) / safe + 4, h)
+    h = np.where(delta == 0, 0, h) / 6.0
+
+    s = np.where(maxc == 0, 0, delta / np.where(maxc == 0, 1, maxc))
+    return np.stack([h, s, maxc], axis=-1)
+
+
+def hsv_to_rgb(hsv):
+    h, s, v = hsv[..., 0], hsv[..., 1], hsv[..., 2]
+    i = np.floor(h * 6).astype(np.int32) % 6
+    f = h * 6 - np.floor(h * 6)
+    p = v * (1 - s)
+    q = v * (1 - s * f)
+    t = v * (1 - s * (1 - f))
+
+    r = np.choose(i, [v, q, p, p, t, v])
+    g = np.choose(i, [t, v, v, q, p, p])
+    b = np.choose(i, [p, p, t, v, v, q])
+    return np.stack([r, g, b], axis=-1)
+
+
+def apply_recipe(arr, recipe):
+    # arr: uint8 RGBA array (h, w, 4). Returns a new uint8 RGBA array.
+    rgb = arr[..., :3].astype(np.float32)
+    alpha = arr[..., 3].astype(np.float32)
+    opaque = alpha > 0
+
+    # 1. Palette remaps on the original colours
+    for src, dst, tol in recipe.get('palette', []):
+        dist = np.sqrt(((rgb - np.array(src, dtype=np.float32)) ** 2).sum(axis=-1))
+        hit = (dist < tol) & opaque
+        # Keep the pixel's shading by shifting it by the palette delta
+        rgb[hit] += np.array(dst, dtype=np.float32) - np.array(src, dtype=np.float32)
+    rgb = np.clip(rgb, 0, 255)
+
+    # 2. Hue / saturation
+    if 'hue' in recipe or 'saturation' in recipe:
+        hsv = rgb_to_hsv(rgb / 255.0)
+        hsv[..., 0] = (hsv[..., 0] + recipe.get('hue', 0) / 360.0) % 1.0
+        hsv[..., 1] = np.clip(hsv[..., 1] * recipe.get('saturation', 1.0), 0, 1)
+        rgb = hsv_to_rgb(hsv) * 255.0
+
+    # 3. Per-channel tint
+    if 'tint' in recipe:
+        rgb *= np.array(recipe['tint'], dtype=np.float32)
+
+    # 4. Luminance curve
+    norm = np.clip(rgb / 255.0, 0, 1)
+    if 'gamma' in recipe:
+        norm = norm ** recipe['gamma']
+    if 'contrast' in recipe:
+        norm = (norm - 0.5) * recipe['contrast'] + 0.5
+    rgb = norm * 255.0 + recipe.get('lift', 0)
+
+    if 'alpha' in recipe:
+        alpha = alpha * recipe['alpha']
+
+    out = np.empty_like(arr)
+    out[..., :3] = np.clip(np.round(rgb), 0, 255).astype(np.uint8)
+    out[..., 3] = np.clip(np.round(alpha), 0, 255).astype(np.uint8)
+    # Fully transparent pixels keep a clean zero colour
+    out[~opaque] = 0
+    return out
+
+
+def scale_cells(img, factor, cell_size=CELL_SIZE):
+    # Grow/shrink each frame around its bottom centre so feet stay planted
+    w, h = img.size
+    out = Image.new("RGBA", (w, h), (0, 0, 0, 0))
+    new_size = int(round(cell_size * factor))
+    for cy in range(0, h, cell_size):
+        for cx in range(0, w, cell_size):
+            cell = img.crop((cx, cy, cx + cell_size, cy + cell_size))
+            cell = cell.resize((new_size, new_size), Image.Resampling.LANCZOS)
+            off_x = (cell_size - new_size) // 2
+            off_y = cell_size - new_size
+            # Crop back to the cell so frames never bleed into neighbours
+            cell = cell.crop((-off_x, -off_y, -off_x + cell_size, -off_y + cell_size))
+            out.paste(cell, (cx, cy))
+    return out
+
+
+def bake_variant(base_img, recipe):
+    arr = np.asarray(base_img.convert("RGBA"))
+    baked = Image.fromarray(apply_recipe(arr, recipe), "RGBA")
+    if recipe.get('scale', 1.0) != 1.0:
+        baked = scale_cells(baked, recipe['scale'])
+    return baked
+
+
+def bake_variants(sprites_dir, recipes, only=None):
+    base_cache = {}
+    entries = []
+
+    for key, recipe in recipes.items():
+        if only and key not in only:
+            continue
+
+        base = recipe['base']
+        if base not in base_cache:
+            base_path = os.path.join(sprites_dir, f"{base}.png")
+            try:
+                base_cache[base] = Image.open(base_path).convert("RGBA")
+            except Exception as e:
+                print(f"Error loading base sheet {base_path}: {e}")
+                base_cache[base] = None
+
+        if base_cache[base] is None:
+            continue
+
+        out_path = os.path.join(sprites_dir, f"{key}.png")
+        baked = bake_variant(base_cache[base], recipe)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        baked.save(out_path, "PNG")
+        print(f"Baked {key} from {base} -> {out_path}")
+        entries.append(key)
+
+    return entries
+
+
+def manifest_entries(keys):
+    return [f"    {{ key: '{key}', src: '/sprites/{key}.png' }}," for key in keys]
+
+
+if __name__ == "__main__":
+    sprites_dir = "public/sprites"
+    recipes = RECIPES
+    only = []
+
+    for arg in sys.argv[1:]:
+        if arg.startswith("--recipes="):
+            with open(arg.split("=", 1)[1]) as f:
+                recipes = json.load(f)
+        elif arg.startswith("--sprites="):
+            sprites_dir = arg.split("=", 1)[1]
+        elif arg in ("-h", "--help"):
+            print("Usage: python recolor_variants.py [--recipes=recipes.json] [--sprites=public/sprites] [enemy ...]")
+            sys.exit(0)
+        else:
+            only.append(arg)
+
+    baked = bake_variants(sprites_dir, recipes, only)
+
+    if baked:
+        print("\n// ASSET_MANIFEST entries (src/data/assets.ts):")
+        for line in manifest_entries(baked):
+            print(line)
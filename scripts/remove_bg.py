@@ -1,22 +1,37 @@
 from PIL import Image
+import numpy as np
 import sys
 import os
 
-def remove_white_background(image_path):
-    try:
-        img = Image.open(image_path)
-        img = img.convert("RGBA")
-        datas = img.getdata()
-
-        newData = []
-        for item in datas:
-            # Change all white (also shades of whites) to transparent
-            if item[0] > 240 and item[1] > 240 and item[2] > 240:
-                newData.append((255, 255, 255, 0))
-            else:
-                newData.append(item)
+from bg_key import estimate_background, background_mask, describe
+from stream_io import run_in_place
+
+def key_white_background(img, key_mode="white"):
+    img = img.convert("RGBA")
+
+    if key_mode == "auto":
+        arr = np.array(img)
+        estimate = estimate_background(arr)
+        arr[background_mask(arr, estimate)] = 0
+        print(f"Estimated {describe(estimate)}")
+        return Image.fromarray(arr, "RGBA")
+
+    datas = img.getdata()
 
-        img.putdata(newData)
+    newData = []
+    for item in datas:
+        # Change all white (also shades of whites) to transparent
+        if item[0] > 240 and item[1] > 240 and item[2] > 240:
+            newData.append((255, 255, 255, 0))
+        else:
+            newData.append(item)
+
+    img.putdata(newData)
+    return img
+
+def remove_white_background(image_path, key_mode="white"):
+    try:
+        img = key_white_background(Image.open(image_path), key_mode)
         img.save(image_path, "PNG")
         print(f"Processed: {image_path}")
     except Exception as e:
@@ -24,7 +39,15 @@ def remove_white_background(image_path):
 
 if __name__ == "__main__":
     if len(sys.argv) > 1:
-        for file_path in sys.argv[1:]:
-            remove_white_background(file_path)
+        key_mode = "white"
+        files = []
+        for arg in sys.argv[1:]:
+            if arg.startswith("--key="):
+                key_mode = arg.split("=")[1]
+            else:
+                files.append(arg)
+
+        run_in_place(files, lambda img: key_white_background(img, key_mode),
+                     "Processed: {}", "Error processing {}: {}")
     else:
-        print("Usage: python remove_bg.py <file_path>")
+        print("Usage: python remove_bg.py [--key=white/auto] <file_path>")
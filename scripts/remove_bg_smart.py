@@ -1,43 +1,60 @@
 from PIL import Image
+import numpy as np
 import sys
 
-def remove_bg_smart(input_path):
-    print(f"Processing {input_path}...")
-    try:
-        img = Image.open(input_path).convert("RGBA")
-        datas = img.getdata()
-        width, height = img.size
-        
-        # Sample corners to find background color
-        corners = [
-            datas[0],                   # Top-Left
-            datas[width-1],             # Top-Right
-            datas[(height-1)*width],    # Bottom-Left
-            datas[height*width - 1]     # Bottom-Right
-        ]
+from bg_key import estimate_background, background_mask, describe
+from stream_io import run_in_place
+
+def remove_bg_smart_image(img, mode="corner"):
+    img = img.convert("RGBA")
+
+    if mode == "auto":
+        # Histogram of the whole border instead of a single corner pixel
+        arr = np.array(img)
+        estimate = estimate_background(arr)
+        print(f"Estimated {describe(estimate)}")
+        arr[background_mask(arr, estimate)] = 0
+        return Image.fromarray(arr, "RGBA")
+
+    datas = img.getdata()
+    width, height = img.size
+    
+    # Sample corners to find background color
+    corners = [
+        datas[0],                   # Top-Left
+        datas[width-1],             # Top-Right
+        datas[(height-1)*width],    # Bottom-Left
+        datas[height*width - 1]     # Bottom-Right
+    ]
+    
+    # Simple voting or just take the first one?
+    # Let's take Top-Left as key
+    bg_key = corners[0]
+    bg_r, bg_g, bg_b, _ = bg_key
+    
+    print(f"Detected Background Key: {bg_key}")
+
+    threshold = 30 # Tolerance
+
+    new_data = []
+    for item in datas:
+        r, g, b, a = item
         
-        # Simple voting or just take the first one?
-        # Let's take Top-Left as key
-        bg_key = corners[0]
-        bg_r, bg_g, bg_b, _ = bg_key
+        # Check distance to bg_key
+        dist = abs(r - bg_r) + abs(g - bg_g) + abs(b - bg_b)
         
-        print(f"Detected Background Key: {bg_key}")
-
-        threshold = 30 # Tolerance
-
-        new_data = []
-        for item in datas:
-            r, g, b, a = item
-            
-            # Check distance to bg_key
-            dist = abs(r - bg_r) + abs(g - bg_g) + abs(b - bg_b)
-            
-            if dist < threshold:
-                new_data.append((0, 0, 0, 0))
-            else:
-                new_data.append(item)
+        if dist < threshold:
+            new_data.append((0, 0, 0, 0))
+        else:
+            new_data.append(item)
 
-        img.putdata(new_data)
+    img.putdata(new_data)
+    return img
+
+def remove_bg_smart(input_path, mode="corner"):
+    print(f"Processing {input_path}...")
+    try:
+        img = remove_bg_smart_image(Image.open(input_path), mode)
         img.save(input_path, "PNG")
         print(f"Done: {input_path}")
     except Exception as e:
@@ -45,5 +62,14 @@ def remove_bg_smart(input_path):
 
 if __name__ == "__main__":
     if len(sys.argv) > 1:
-        for f in sys.argv[1:]:
-            remove_bg_smart(f)
+        mode = "corner"
+        files = []
+        for arg in sys.argv[1:]:
+            if arg.startswith("--mode="):
+                mode = arg.split("=")[1]
+            else:
+                files.append(arg)
+
+        run_in_place(files, lambda img: remove_bg_smart_image(img, mode))
+    else:
+        print("Usage: python remove_bg_smart.py [--mode=corner/auto] <file1> <file2> ...")
@@ -1,11 +1,9 @@
 from PIL import Image
 import sys
 
-def stabilize_torch_absolute(path):
-    print(f"Stabilizing {path} with absolute handle transplant...")
-    img = Image.open(path).convert("RGBA")
+def stabilize_torch_image(img, n_frames=4):
+    img = img.convert("RGBA")
     w, h = img.size
-    n_frames = 4
     frame_w = w // n_frames
     
     frames = []
@@ -36,6 +34,11 @@ def stabilize_torch_absolute(path):
         # Add to sheet
         new_img.paste(frame, (i * frame_w, 0))
         
+    return new_img
+
+def stabilize_torch_absolute(path):
+    print(f"Stabilizing {path} with absolute handle transplant...")
+    new_img = stabilize_torch_image(Image.open(path))
     new_img.save(path)
     print("Absolute stabilization complete.")
 
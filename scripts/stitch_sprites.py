@@ -1,12 +1,18 @@
 
 from PIL import Image
+import numpy as np
 import sys
 import os
 import math
 
-def clean_and_extract_grid(input_path, rows=4, cols=4, limit_cols=None):
+from bg_key import estimate_background, background_mask, describe
+
+def clean_and_extract_grid(input_path, rows=4, cols=4, limit_cols=None, key_mode="probe"):
     print(f"Loading {input_path}...")
-    img = Image.open(input_path).convert("RGBA")
+    return extract_grid(Image.open(input_path), rows, cols, limit_cols, key_mode)
+
+def extract_grid(img, rows=4, cols=4, limit_cols=None, key_mode="probe"):
+    img = img.convert("RGBA")
     w, h = img.size
     cell_w = w // cols
     cell_h = h // rows
@@ -16,6 +22,7 @@ def clean_and_extract_grid(input_path, rows=4, cols=4, limit_cols=None):
     output_cols = limit_cols if limit_cols is not None else cols
     clean_img = Image.new("RGBA", (output_cols * tgt_size, rows * tgt_size), (0,0,0,0))
     pixels = img.load()
+    arr = np.asarray(img) if key_mode == "auto" else None
     
     # Calculate safe area to ignore text labels (typically on top/left)
     margin_top = int(cell_h * 0.1) # Ignore top 10%
@@ -29,6 +36,15 @@ def clean_and_extract_grid(input_path, rows=4, cols=4, limit_cols=None):
 
             src_x = c * cell_w
             src_y = r * cell_h
+
+            bg_mask = None
+            if key_mode == "auto":
+                # Estimate the key from the cell's border band (past the label margins)
+                cell = arr[src_y + margin_top:src_y + cell_h, src_x + margin_left:src_x + cell_w]
+                estimate = estimate_background(cell)
+                bg_mask = background_mask(cell, estimate)
+                if estimate['confidence'] < 0.5:
+                    print(f"  Cell ({r},{c}): low confidence key, {describe(estimate)}")
             
             # --- STEP 1: FIND BACKGROUND REFERENCE COLOR ---
             # Scan corners (with offset) to find the "greenest" pixel (highest G value)
@@ -70,9 +86,11 @@ def clean_and_extract_grid(input_path, rows=4, cols=4, limit_cols=None):
                     pr, pg, pb = rgb[0], rgb[1], rgb[2]
                     
                     is_background = False
-                    
+
+                    if bg_mask is not None:
+                        is_background = bg_mask[y - margin_top, x - margin_left]
                     # 1. Dark Protection: If it's dark, it's NOT background (Shadows/Fur)
-                    if pg < 80:
+                    elif pg < 80:
                         is_background = False
                     else:
                         # 2. Euclidean Distance to Reference
@@ -117,20 +135,32 @@ def clean_and_extract_grid(input_path, rows=4, cols=4, limit_cols=None):
                         
     return clean_img
 
-def stitch_sheets(walk_path, attack_path, output_path, limit_cols=None):
+def stitch_sheets(walk_path, attack_path, output_path, limit_cols=None, key_mode="probe"):
     # limit_cols: If set (e.g. 2), only take the first N columns from the input sheet
     # This handles cases where DALL-E generates variants side-by-side
     
     # Allow passing limit_cols via argv[4] if present
     
+    walk_src = Image.open(walk_path)
+    atk_src = None
+    if attack_path and attack_path.lower() != "none":
+        atk_src = Image.open(attack_path)
+
+    final_img = stitch_images(walk_src, atk_src, limit_cols, key_mode)
+        
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    final_img.save(output_path)
+    print(f"Saved Combined Sheet: {output_path}")
+
+def stitch_images(walk_src, atk_src=None, limit_cols=None, key_mode="probe"):
     print("Processing Walk Sheet...")
     # Input is ALWAYS 4 cols, output is limited
-    walk_img = clean_and_extract_grid(walk_path, 4, 4, limit_cols)
+    walk_img = extract_grid(walk_src, 4, 4, limit_cols, key_mode)
     
     atk_img = None
-    if attack_path and attack_path.lower() != "none":
+    if atk_src is not None:
         print("Processing Attack Sheet...")
-        atk_img = clean_and_extract_grid(attack_path, 4, 4, limit_cols)
+        atk_img = extract_grid(atk_src, 4, 4, limit_cols, key_mode)
     
     # Combined: double the width (Walk + Attack) if Attack exists
     
@@ -157,14 +187,21 @@ def stitch_sheets(walk_path, attack_path, output_path, limit_cols=None):
             atk_row_crop = atk_img.crop((0, r*256, used_cols*256, (r+1)*256))
             final_img.paste(atk_row_crop, (used_cols*256, dest_y))
         
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    final_img.save(output_path)
-    print(f"Saved Combined Sheet: {output_path}")
+    return final_img
 
 if __name__ == "__main__":
-    path1 = sys.argv[1]
-    path2 = sys.argv[2]
-    out = sys.argv[3]
-    limit = int(sys.argv[4]) if len(sys.argv) > 4 else None
+    # --key=auto swaps the greenest-probe key for the border histogram estimate
+    key_mode = "probe"
+    args = []
+    for arg in sys.argv[1:]:
+        if arg.startswith("--key="):
+            key_mode = arg.split("=")[1]
+        else:
+            args.append(arg)
+
+    path1 = args[0]
+    path2 = args[1]
+    out = args[2]
+    limit = int(args[3]) if len(args) > 3 else None
     
-    stitch_sheets(path1, path2, out, limit)
+    stitch_sheets(path1, path2, out, limit, key_mode)
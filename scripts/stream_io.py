@@ -0,0 +1,128 @@
+from PIL import Image
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+# Overlapped decode -> compute -> encode for batch scripts.
+#
+# Pillow releases the GIL inside the PNG (zlib) codec, so decoding the next
+# inputs and compressing the previous outputs on worker threads overlaps with
+# the keying/stitch/align work running on the main thread. Both queues are
+# bounded so at most `prefetch` decoded inputs and `writers * 2` pending
+# outputs are held in memory at once.
+
+DEFAULT_READERS = 2
+DEFAULT_WRITERS = 2
+DEFAULT_PREFETCH = 4
+
+
+def load_image(path):
+    # Force the decode now (on the reader thread) rather than lazily on first use
+    img = Image.open(path)
+    img.load()
+    return img
+
+
+def save_png_atomic(img, path, **save_args):
+    # Encode to a temp file next to the target, then swap it in
+    out_dir = os.path.dirname(path)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    tmp = os.path.join(out_dir, f".{os.path.basename(path)}.{os.getpid()}.tmp")
+    try:
+        img.save(tmp, "PNG", **save_args)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def stream_process(tasks, load, compute, save, readers=DEFAULT_READERS,
+                   writers=DEFAULT_WRITERS, prefetch=DEFAULT_PREFETCH):
+    # load(task) runs on the reader pool, compute(task, data) on the calling
+    # thread, save(task, result) on the writer pool.
+    # Yields (task, saved_value, error) as each task completes; a failure in
+    # any stage is reported through `error` and does not stop the remaining
+    # tasks.
+    tasks = iter(tasks)
+    read_pool = ThreadPoolExecutor(max_workers=readers)
+    write_pool = ThreadPoolExecutor(max_workers=writers)
+    pending_reads = deque()
+    pending_writes = deque()
+    max_writes = max(1, writers * 2)
+
+    def fill_reads():
+        while len(pending_reads) < prefetch:
+            try:
+                task = next(tasks)
+            except StopIteration:
+                return
+            pending_reads.append((task, read_pool.submit(load, task)))
+
+    def finished_write(block):
+        if not pending_writes:
+            return None
+        task, fut = pending_writes[0]
+        if not block and not fut.done():
+            return None
+        pending_writes.popleft()
+        try:
+            return task, fut.result(), None
+        except Exception as e:
+            return task, None, e
+
+    try:
+        fill_reads()
+        while pending_reads:
+            task, fut = pending_reads.popleft()
+            fill_reads()
+
+            try:
+                result = compute(task, fut.result())
+            except Exception as e:
+                yield task, None, e
+                continue
+
+            # Back-pressure: wait for the oldest write if the queue is full
+            while len(pending_writes) >= max_writes:
+                yield finished_write(block=True)
+            pending_writes.append((task, write_pool.submit(save, task, result)))
+
+            done = finished_write(block=False)
+            while done is not None:
+                yield done
+                done = finished_write(block=False)
+
+        while pending_writes:
+            yield finished_write(block=True)
+    finally:
+        # On interruption drop anything still queued but let started writes
+        # finish, so no output is left half-written
+        read_pool.shutdown(wait=False, cancel_futures=True)
+        write_pool.shutdown(wait=True, cancel_futures=True)
+
+
+def stream_in_place(paths, transform, **kwargs):
+    # Convenience wrapper for the scripts that rewrite their inputs:
+    # yields (path, error) once each file has been transformed and replaced
+    def compute(path, img):
+        return transform(img)
+
+    def save(path, img):
+        save_png_atomic(img, path)
+
+    for path, _, error in stream_process(paths, load_image, compute, save, **kwargs):
+        yield path, error
+
+
+def run_in_place(paths, transform, done="Done: {}", failed="Failed to process {}: {}", **kwargs):
+    # CLI loop shared by the in-place scripts: transform every file and print
+    # `done` / `failed` (formatted with the path, and the error) per file
+    errors = 0
+    for path, error in stream_in_place(paths, transform, **kwargs):
+        if error:
+            errors += 1
+            print(failed.format(path, error))
+        else:
+            print(done.format(path))
+    return errors